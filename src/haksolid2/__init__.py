@@ -7,6 +7,18 @@ from . import operations
 from . import metadata
 from . import errors
 from . import processing
-from . import openscad
-from . import paradigms
-from . import exporters
\ No newline at end of file
+import importlib
+
+# imported on first access (PEP 562), so that loading the core package does not
+# pull in the OpenSCAD backend, the exporters or optional solver dependencies
+_lazySubpackages = ("openscad", "paradigms", "exporters", "prefabs")
+
+
+def __getattr__(name):
+	if name in _lazySubpackages:
+		return importlib.import_module(f".{name}", __name__)
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+	return sorted(set(globals()) | set(_lazySubpackages))
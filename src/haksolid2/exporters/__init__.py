@@ -1,4 +1,29 @@
-from .ultralaser import Ultralaser
-from .freecad import FreeCAD
-from .cura import CuraLayer, infillMesh, cuttingMesh, supportBlock, supportMesh, Cura
-from .kicad import KiCAD
+import importlib
+
+# exporters drive external tools and pull in most of the package, so they are
+# imported on first access (PEP 562)
+_exports = {
+  "Ultralaser": "ultralaser",
+  "FreeCAD": "freecad",
+  "CuraLayer": "cura",
+  "infillMesh": "cura",
+  "cuttingMesh": "cura",
+  "supportBlock": "cura",
+  "supportMesh": "cura",
+  "Cura": "cura",
+  "KiCAD": "kicad",
+}
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+	if name in _exports:
+		value = getattr(importlib.import_module(f".{_exports[name]}", __name__),
+		                name)
+		globals()[name] = value
+		return value
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__))
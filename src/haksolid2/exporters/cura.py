@@ -61,6 +61,7 @@ class Cura(processing.ProcessBase):
 		processing.ProcessBase.__init__(s, **kwargs)
 
 	def _processLayer(s, T: M, root, subproc):
+		"""Schedules the render of a layer, returning a future of its results"""
 
 		ent = processing.EntityNode(subproc)
 		fakeroot = transform.matrix(T)
@@ -71,13 +72,12 @@ class Cura(processing.ProcessBase):
 		subent = processing.EntityRecord(processing.EntityNode, ent, "", "",
 		                                 subproc)
 
-		res = processing.buildEntity(subent)
+		res = subproc.submit(subent)
 
 		fakeroot.unlink()
 		fakeroot.dropChildren()
 
-		soup = s._extractSoup(res)
-		return soup
+		return res
 
 	def _extractSoup(s, res: processing.ProcessResults):
 
@@ -94,19 +94,20 @@ class Cura(processing.ProcessBase):
 	def _generateObjectXML(s, id, layer, soup: FaceSoup):
 		xml = f'<object id="{id}" type="model">\n'
 
+		if not isinstance(soup, IndexedMesh):
+			try:
+				soup = IndexedMesh.FromFaceSoup(soup)
+			except ValueError:
+				raise RuntimeError("non-triangular mesh in cura process")
+
 		xml += '<mesh>\n'
 		xml += '<vertices>\n'
-		for face in soup.faces:
-			if len(face.vertices) != 3:
-				raise RuntimeError("non-triangular mesh in cura process")
-			for v in face.vertices:
-				xml += f'<vertex x="{v.x}" y="{v.z}" z="{-v.y}" />\n'
+		xml += "".join(f'<vertex x="{x}" y="{z}" z="{-y}" />\n'
+		               for x, y, z in soup.vertices.tolist())
 		xml += '</vertices>\n'
 		xml += '<triangles>\n'
-		i_vertex = 0
-		for face in soup.faces:
-			xml += f'<triangle v1="{i_vertex}" v2="{i_vertex+1}" v3="{i_vertex+2}" />\n'
-			i_vertex += 3
+		xml += "".join(f'<triangle v1="{a}" v2="{b}" v3="{c}" />\n'
+		               for a, b, c in soup.indices.tolist())
 		xml += '</triangles>\n'
 		xml += '</mesh>\n'
 
@@ -127,13 +128,12 @@ class Cura(processing.ProcessBase):
 
 		subproc = openscad.OpenSCADBuild(outputFile=False, outputGeometry=True)
 
+		jobs = list()
+
 		if True: # build the main geometry
 			subent = processing.EntityRecord(processing.EntityNode, ent.node.node, "",
 			                                 "", subproc)
-			res = processing.buildEntity(subent)
-			soup = s._extractSoup(res)
-			xml_objects += s._generateObjectXML(object_count + 2, None, soup)
-			object_count += 1
+			jobs.append((None, subproc.submit(subent)))
 
 		if True: # add all sub-layers to the mix
 			layers = metadata.LayersVisitor(shallow=False)
@@ -143,10 +143,17 @@ class Cura(processing.ProcessBase):
 				if layer == ent.node: continue
 				if not isinstance(layer, CuraLayer): continue
 
-				soup = s._processLayer(T, layer, subproc)
-				xml_objects += s._generateObjectXML(object_count + 2, layer, soup)
-				object_count += 1
+				jobs.append((layer, s._processLayer(T, layer, subproc)))
+
+		for layer, future in jobs:
+			soup = s._extractSoup(future.result())
+			xml_objects += s._generateObjectXML(object_count + 2, layer, soup)
+			object_count += 1
+
+		with processing.profiling.phase("export"):
+			return s._write3MF(ent, xml_objects)
 
+	def _write3MF(s, ent, xml_objects):
 		fn_out = os.path.join(s.getOutputDirectory(True), ent.name + ".3mf")
 
 		# group all objects in this part
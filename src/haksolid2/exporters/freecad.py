@@ -35,43 +35,41 @@ class FreeCAD(openscad.OpenSCADBuild):
 		fn_out = os.path.join(s.getOutputDirectory(True), ent.name + s.format)
 
 		fn_tmp = tempfile.mkdtemp()
-		cwd = os.getcwd()
 		try:
-			os.chdir(fn_tmp)
-
-			with open("in.csg", "wb") as f:
+			fn_csg = os.path.join(fn_tmp, "in.csg")
+			with open(fn_csg, "wb") as f:
 				f.write(res.data["raw"])
 
-			p = subprocess.Popen(["freecad", "-c"], stdin=subprocess.PIPE)
-
-			p.stdin.write((f'import FreeCAD\n'
-			               f'import importCSG\n'
-			               f'importCSG.insert(u"in.csg","Unnamed")\n').encode())
+			script = (f'import FreeCAD\n'
+			          f'import importCSG\n'
+			          f'importCSG.insert({fn_csg!r},"Unnamed")\n')
 
 			if s.format == ".fcstd":
-				p.stdin.write(
-				  (f'App.getDocument("Unnamed").saveAs(u"{fn_out}")\n').encode())
+				script += f'App.getDocument("Unnamed").saveAs({fn_out!r})\n'
 			elif s.format == ".step":
-				p.stdin.write((
+				script += (
 				  f'import Import\n'
-				  f'Import.export(FreeCAD.getDocument("Unnamed").findObjects()[-1:],u"{fn_out}")\n'
-				).encode())
+				  f'Import.export(FreeCAD.getDocument("Unnamed").findObjects()[-1:],{fn_out!r})\n'
+				)
 			else:
 				raise RuntimeError(
 				  f"unsupported format for FreeCAD process: {s.format}")
 
-			p.stdin.write(b'exit()\n')
-			p.stdin.flush()
-			# p.stdin.close()
-			p.wait()
+			script += 'exit()\n'
+
+			with processing.profiling.phase("export"):
+				p = subprocess.Popen(["freecad", "-c"],
+				                     cwd=fn_tmp,
+				                     stdin=subprocess.PIPE,
+				                     stderr=subprocess.PIPE)
+				(_, serr) = p.communicate(script.encode())
 			if p.returncode != 0:
 				raise RuntimeError("error translating CSG to FreeCAD: \n" +
-				                   p.stderr.read().decode())
+				                   serr.decode())
 
 			res.files.append(fn_out)
 
 		finally:
-			os.chdir(cwd)
-			shutil.rmtree(fn_tmp)
+			shutil.rmtree(fn_tmp, ignore_errors=True)
 
-		return res
\ No newline at end of file
+		return res
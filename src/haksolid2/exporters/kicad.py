@@ -126,6 +126,7 @@ class KiCAD(processing.ProcessBase):
 		return KiCADLayer("User.9",**kwargs)
 
 	def _processLayer(s, T: M, root, subproc):
+		"""Schedules the render of a layer, returning a future of its results"""
 
 		ent = processing.EntityNode(subproc)
 		fakeroot = transform.matrix(T)
@@ -134,14 +135,14 @@ class KiCAD(processing.ProcessBase):
 			fakeroot * child
 
 		subent = processing.EntityRecord(processing.EntityNode, ent, "", "",
-																		subproc)
+		                                 subproc)
 
-		res = processing.buildEntity(subent)
+		res = subproc.submit(subent)
 
 		fakeroot.unlink()
 		fakeroot.dropChildren()
 
-		return s._extractSoup(res)
+		return res
 
 	def _extractSoup(s, res: processing.ProcessResults):
 
@@ -172,7 +173,11 @@ class KiCAD(processing.ProcessBase):
 				if layer == ent.node: continue
 				if not isinstance(layer, KiCADLayer): continue
 
-				soup = s._processLayer(T, layer, subproc)
+				jobs.append(KiCAD_job_t(T, s._processLayer(T, layer, subproc), layer,
+				                        layer.fill))
+
+			for T, future, layer, fill in jobs:
+				soup = s._extractSoup(future.result())
 
 				for face in soup.faces:
 					if len(face.vertices) < 2: continue
@@ -183,7 +188,7 @@ class KiCAD(processing.ProcessBase):
 		fn_out = os.path.join(s.getOutputDirectory(True), ent.name + ".kicad_pcb")
 
 
-		with open(fn_out,"w") as f:
+		with processing.profiling.phase("export"), open(fn_out, "w") as f:
 			f.write(s.CodeTemplate.format(thickness=s.thickness,code=code))
 
 		res = processing.ProcessResults()
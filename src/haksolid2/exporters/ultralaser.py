@@ -52,6 +52,7 @@ class Ultralaser(lasercut.LasercutProcess):
 			s.contourParams = material.computeParams(proc)
 
 	def _processLayer(s, T: M, root, subproc):
+		"""Schedules the render of a layer, returning a future of its results"""
 
 		ent = processing.EntityNode(subproc)
 		fakeroot = transform.matrix(T)
@@ -62,12 +63,12 @@ class Ultralaser(lasercut.LasercutProcess):
 		subent = processing.EntityRecord(processing.EntityNode, ent, "", "",
 		                                 subproc)
 
-		res = processing.buildEntity(subent)
+		res = subproc.submit(subent)
 
 		fakeroot.unlink()
 		fakeroot.dropChildren()
 
-		return s._extractSoup(res)
+		return res
 
 	def _extractSoup(s, res: processing.ProcessResults):
 
@@ -96,11 +97,12 @@ class Ultralaser(lasercut.LasercutProcess):
 				if layer == ent.node: continue
 				if not isinstance(layer, paradigms.lasercut.LasercutLayer): continue
 
-				soup = s._processLayer(T, layer, subproc)
+				future = s._processLayer(T, layer, subproc)
 				penetrates = layer.node.depth >= s.thickness
 				params = s.material.computeParams(layer)
 
-				jobs.append(ultralaser_job_t(T, params, penetrates, soup, layer.mode))
+				jobs.append(
+				  ultralaser_job_t(T, params, penetrates, future, layer.mode))
 
 		if s.contourDepth > 0: # add contour to the list
 
@@ -111,16 +113,22 @@ class Ultralaser(lasercut.LasercutProcess):
 			if dims.has2d:
 				subent = processing.EntityRecord(processing.EntityNode, ent.node.node,
 				                                 "", "", subproc)
-				res = processing.buildEntity(subent)
-				soup = s._extractSoup(res)
+				future = subproc.submit(subent)
 				penetrates = s.contourDepth >= s.thickness
 
 				jobs.append(
-				  ultralaser_job_t(M(), s.contourParams, penetrates, soup,
+				  ultralaser_job_t(M(), s.contourParams, penetrates, future,
 				                   lasercut.LasercutLayer.TraceContour))
-		# soup = s._processLayer(M(), ent.node, subproc)
-		# jobs.append((M(), ent.node, soup))
 
+		# wait for all renders scheduled above
+		jobs = [
+		  job._replace(soup=s._extractSoup(job.soup.result())) for job in jobs
+		]
+
+		with processing.profiling.phase("export"):
+			return s._writeGCode(ent, jobs)
+
+	def _writeGCode(s, ent, jobs):
 		# extract bounding box and create transformation operator (gen_point) for raw points
 		minx, maxx, miny, maxy = 1e30, -1e30, 1e30, -1e30
 		for job in jobs:
@@ -2,54 +2,128 @@ import re
 import numpy
 from collections import namedtuple
 from collections.abc import Iterable
-from sympy import cos, sin, tan, pi, asin, acos
+import importlib
 import shlex
-import sympy
 import math
+import sys
+
+
+class _LazyModule:
+	"""Stands in for a module that is only imported on first attribute access"""
+	def __init__(s, name):
+		s._name = name
+		s._module = None
+
+	def __getattr__(s, attr):
+		if s._module is None:
+			s._module = importlib.import_module(s._name)
+		return getattr(s._module, attr)
+
+
+class _LazyAttribute:
+	"""Stands in for an attribute of a _LazyModule, e.g. a sympy constant. It is
+	resolved when used in arithmetic, comparisons or sympy functions."""
+	def __init__(s, module, attr):
+		s._lazyModule = module
+		s._attr = attr
+
+	def _sympy_(s):
+		return getattr(s._lazyModule, s._attr)
+
+	def __getattr__(s, attr):
+		if attr.startswith("__"): # e.g. __sympy__, would pass it as sympy object
+			raise AttributeError(attr)
+		return getattr(s._sympy_(), attr)
+
+
+def _forward(op):
+	return lambda s, *args: getattr(s._sympy_(), op)(*args)
+
+
+for _op in ("add", "radd", "sub", "rsub", "mul", "rmul", "truediv", "rtruediv",
+            "pow", "rpow", "neg", "pos", "abs", "float", "int", "eq", "ne", "lt",
+            "le", "gt", "ge", "hash", "str", "repr"):
+	setattr(_LazyAttribute, f"__{_op}__", _forward(f"__{_op}__"))
+
+# sympy takes longer to import than the rest of the package and is only needed
+# once a model uses symbolic values (metadata.variable)
+sympy = _LazyModule("sympy")
+
+pi = _LazyAttribute(sympy, "pi")
+pi_float = math.pi
+
+_numericTypes = (float, int, numpy.floating, numpy.integer)
 
 
 def isSymbolic(v):
-	if isinstance(v, sympy.core.Expr):
-		return True
-	elif isinstance(v, (M, V)):
+	if isinstance(v, (M, V)):
 		return v.isSymbolic
-	return False
+	elif isinstance(v, _LazyAttribute):
+		return isSymbolic(v._sympy_())
+	elif isinstance(v, _numericTypes) or "sympy" not in sys.modules:
+		# no sympy expression can exist before sympy is imported
+		return False
+	return isinstance(v, sympy.core.Expr)
 
 
 def cosSin(a, deg=True):
-	if isSymbolic(a):
-		a = a * sympy.pi / 180
-		return sympy.cos(a), sympy.sin(a)
-	else:
+	if type(a) is float or type(a) is int or not isSymbolic(a):
 		a = a * math.pi / 180
 		return math.cos(a), math.sin(a)
+	a = a * sympy.pi / 180
+	return sympy.cos(a), sympy.sin(a)
 
 
 def sin(a, deg=True):
-	if isSymbolic(a):
-		a = a * sympy.pi / 180
-		return sympy.sin(a)
-	else:
-		a = a * math.pi / 180
-		return math.sin(a)
+	if type(a) is float or type(a) is int or not isSymbolic(a):
+		return math.sin(a * math.pi / 180)
+	return sympy.sin(a * sympy.pi / 180)
 
 
 def cos(a, deg=True):
-	if isSymbolic(a):
-		a = a * sympy.pi / 180
-		return sympy.cos(a)
-	else:
-		a = a * math.pi / 180
-		return math.cos(a)
+	if type(a) is float or type(a) is int or not isSymbolic(a):
+		return math.cos(a * math.pi / 180)
+	return sympy.cos(a * sympy.pi / 180)
 
 
 def tan(a, deg=True):
-	if isSymbolic(a):
-		a = a * sympy.pi / 180
-		return sympy.tan(a)
-	else:
-		a = a * math.pi / 180
-		return math.tan(a)
+	if type(a) is float or type(a) is int or not isSymbolic(a):
+		return math.tan(a * math.pi / 180)
+	return sympy.tan(a * sympy.pi / 180)
+
+
+def asin(v):
+	"""Arc sine in radians"""
+	if type(v) is float or type(v) is int or not isSymbolic(v):
+		return math.asin(v)
+	return sympy.asin(v)
+
+
+def acos(v):
+	"""Arc cosine in radians"""
+	if type(v) is float or type(v) is int or not isSymbolic(v):
+		return math.acos(v)
+	return sympy.acos(v)
+
+
+def _isExpr(v):
+	if isinstance(v, _LazyAttribute): return True
+	return "sympy" in sys.modules and isinstance(v, sympy.core.Expr)
+
+
+def _numericArray(values, ndim):
+	"""Returns a float copy of values if they form a numeric array of the given
+	dimension, or None if they need to be inspected element by element (e.g.
+	because they are symbolic). Only object arrays are scanned for sympy
+	expressions, by the caller."""
+	if not isinstance(values, numpy.ndarray):
+		try:
+			values = numpy.asarray(values)
+		except ValueError: # ragged rows
+			return None
+	if values.ndim != ndim or values.dtype.kind not in "biuf":
+		return None
+	return values.astype(float)
 
 
 class V(numpy.ndarray):
@@ -61,14 +135,20 @@ class V(numpy.ndarray):
 	def __new__(s, *args):
 		if len(args) == 1:
 			arg = args[0]
-			if isinstance(arg, Iterable):
+			if isinstance(arg, numpy.ndarray):
+				args = arg
+			elif isinstance(arg, Iterable):
 				args = [v for v in arg]
 			else:
 				args = [arg]
 
+		values = _numericArray(args, 1)
+		if values is not None:
+			return values.view(s)
+
 		is_symbolic = False
 		for arg in args:
-			if isinstance(arg, sympy.core.Expr):
+			if _isExpr(arg):
 				is_symbolic = True
 				break
 
@@ -85,10 +165,11 @@ class V(numpy.ndarray):
 
 	@property
 	def isSymbolic(s):
-		for v in s:
-			if isSymbolic(v):
-				return True
-		return False
+		# numeric vectors are stored as float arrays, only object arrays can hold
+		# sympy expressions
+		if s.dtype != object:
+			return False
+		return any(_isExpr(v) for v in s)
 
 	@classmethod
 	def Cylinder(cls, phi, r=1, z=0):
@@ -101,19 +182,15 @@ class V(numpy.ndarray):
 		else:
 			return numpy.ndarray.__getitem__(s, k)
 
-	def __getattribute__(s, attr):
-		def resolve(key):
-			if key == "o": return 1
-			elif key == "n": return 0
-			else: return s[V.key_dimensions[key]]
-
-		if V.e_subrange.fullmatch(attr):
-			if len(attr) == 1:
-				return resolve(attr)
-			else:
-				return V(resolve(k) for k in attr)
-		else:
-			return numpy.ndarray.__getattribute__(s, attr)
+	def __getattr__(s, attr):
+		# only reached for names not found on the class: swizzles are resolved here
+		# once and installed as properties, so later accesses skip this entirely
+		if not V.e_subrange.fullmatch(attr):
+			raise AttributeError(
+			  f"'{type(s).__name__}' object has no attribute '{attr}'")
+		getter = _vectorSwizzle(attr)
+		setattr(V, attr, property(getter))
+		return getter(s)
 
 	def cross(a, b):
 		if isinstance(b, V):
@@ -152,6 +229,77 @@ class V(numpy.ndarray):
 		return s / s.norm
 
 
+def _vectorSwizzle(attr):
+	"""Returns a getter for a swizzle such as x, xyz or xyo on vectors, where o
+	and n stand for the constants one and null."""
+	def resolve(s, key):
+		if key == "o": return 1
+		elif key == "n": return 0
+		else: return s[V.key_dimensions[key]]
+
+	if len(attr) == 1:
+		if attr in "on":
+			return lambda s: resolve(s, attr)
+		index = V.key_dimensions[attr]
+		return lambda s: numpy.ndarray.__getitem__(s, index)
+
+	indices = numpy.array([V.key_dimensions.get(k, 0) for k in attr])
+	constant = numpy.array([k in "on" for k in attr])
+	values = numpy.array([1.0 if k == "o" else 0.0 for k in attr])[constant]
+
+	if not constant.any():
+		return lambda s: numpy.ndarray.__getitem__(s, indices)
+
+	def getter(s):
+		if s.dtype == object or len(s) < 1:
+			return V(resolve(s, k) for k in attr)
+		res = numpy.ndarray.__getitem__(s, indices)
+		res[constant] = values
+		return res
+
+	return getter
+
+
+def _matrixAccessor(attr):
+	"""Returns a getter for element (a12, a1_2), block (a11_a33), element list
+	(a11a22), row/column (row1, col4) and swizzle attributes of matrices, or None
+	if attr is none of those."""
+	m = M.e_key.fullmatch(attr)
+	if m:
+		g = m.groups()
+		i = int(g[0] or g[2])
+		j = int(g[1] or g[3])
+		return lambda s: s[i - 1, j - 1]
+	m = M.e_block.fullmatch(attr)
+	if m:
+		g = m.groups()
+		block = (slice(int(g[1] or g[3]) - 1, int(g[6] or g[8])),
+		         slice(int(g[2] or g[4]) - 1, int(g[7] or g[9])))
+		return lambda s: s[block]
+	subs = M.e_key.findall(attr)
+	if len(subs) > 0:
+		keys = [(int(a or c) - 1, int(b or d) - 1) for a, b, c, d in subs]
+		return lambda s: V(s[key] for key in keys)
+	m = M.e_rowcol.fullmatch(attr)
+	if m:
+		g = m.groups()
+		k = int(g[1]) - 1
+		if g[0] == "row": return lambda s: s[k, :]
+		else: return lambda s: s[:, k]
+	if V.e_subrange.fullmatch(attr):
+
+		def resolve(s, key):
+			if key == "o": return 1
+			elif key == "n": return 0
+			else: return s[V.key_dimensions[key]]
+
+		if len(attr) == 1:
+			return lambda s: resolve(s, attr)
+		else:
+			return lambda s: V(resolve(s, k) for k in attr)
+	return None
+
+
 class M(numpy.ndarray):
 	"""Augmented subclass of numpy matrices.
 	For usability reasons, we added more versatile constructors, getters and methods such as inverse computation."""
@@ -162,6 +310,13 @@ class M(numpy.ndarray):
 	                     "(a([1-9])([1-9])|a([1-9][0-9]*)_([1-9][0-9]*))")
 
 	def __new__(s, *args):
+		if len(args) < 1:
+			return numpy.identity(4).view(s)
+
+		values = _numericArray(args[0] if len(args) == 1 and isinstance(
+		  args[0], numpy.ndarray) else args, 2)
+		if values is not None:
+			return values.view(s)
 
 		if len(args) == 1 and isinstance(args[0], numpy.ndarray):
 			A = args[0]
@@ -172,7 +327,7 @@ class M(numpy.ndarray):
 			is_symbolic = False
 			for row in A:
 				for cell in row:
-					if isinstance(cell, sympy.core.Expr):
+					if _isExpr(cell):
 						is_symbolic = True
 						break
 				else:
@@ -211,7 +366,7 @@ class M(numpy.ndarray):
 		is_symbolic = False
 		for row in args:
 			for cell in row:
-				if isinstance(cell, sympy.core.Expr):
+				if _isExpr(cell):
 					is_symbolic = True
 					break
 			else:
@@ -240,47 +395,34 @@ class M(numpy.ndarray):
 		  buffer=numpy.array(values),
 		  dtype=sympy.core.Expr if is_symbolic else float)
 
-	def __getattribute__(s, attr):
-		m = M.e_key.fullmatch(attr)
-		if m:
-			g = m.groups()
-			i = int(g[0] or g[2])
-			j = int(g[1] or g[3])
-			return s[i - 1, j - 1]
-		m = M.e_block.fullmatch(attr)
-		if m:
-			g = m.groups()
-			return s[int(g[1] or g[3]) - 1:int(g[6] or g[8]),
-			         int(g[2] or g[4]) - 1:int(g[7] or g[9])]
-		subs = M.e_key.findall(attr)
-		if len(subs) > 0:
-			return V(s[int(a or c) - 1, int(b or d) - 1] for a, b, c, d in subs)
-		m = M.e_rowcol.fullmatch(attr)
-		if m:
-			g = m.groups()
-			if g[0] == "row": return s[int(g[1]) - 1, :]
-			else: return s[:, int(g[1]) - 1]
-		if V.e_subrange.fullmatch(attr):
-
-			def resolve(key):
-				if key == "o": return 1
-				elif key == "n": return 0
-				else: return s[V.key_dimensions[key]]
-
-			if len(attr) == 1:
-				return resolve(attr)
-			else:
-				return V(resolve(k) for k in attr)
-		else:
-			return numpy.ndarray.__getattribute__(s, attr)
+	def __getattr__(s, attr):
+		# see V.__getattr__
+		getter = _matrixAccessor(attr)
+		if getter is None:
+			raise AttributeError(
+			  f"'{type(s).__name__}' object has no attribute '{attr}'")
+		setattr(M, attr, property(getter))
+		return getter(s)
 
 	@property
 	def isSymbolic(s):
-		for row in s:
-			for cell in row:
-				if isSymbolic(cell):
-					return True
-		return False
+		# see V.isSymbolic
+		if s.dtype != object:
+			return False
+		return any(_isExpr(cell) for cell in s.flat)
+
+	def applyPoints(s, points, w=1):
+		"""Applies this affine 4x4 transform to an (N,2) or (N,3) array of points
+		at once, extending them to homogeneous coordinates (x,y,0,w) or (x,y,z,w).
+		Pass w=0 to transform directions such as normals. Returns an (N,3) array."""
+		points = numpy.asarray(points)
+		if points.ndim != 2 or points.shape[1] not in (2, 3):
+			raise ValueError("points must be given as an (N,2) or (N,3) array")
+		A = numpy.asarray(s)
+		res = points @ A[:3, :points.shape[1]].T
+		if w != 0:
+			res = res + w * A[:3, 3]
+		return res
 
 	@property
 	def inverse(s):
@@ -485,6 +627,49 @@ class M(numpy.ndarray):
 face_t = namedtuple("face_t", "normal vertices")
 
 
+def weldVertices(points):
+	"""Merges identical points of an (N,k) array. Returns the array of unique
+	points and an array mapping each input point to its unique index."""
+	points = numpy.asarray(points, dtype=float)
+	if len(points) < 1:
+		return points.reshape(0, points.shape[-1]), numpy.zeros(0, dtype=numpy.uint32)
+	unique, inverse = numpy.unique(points, axis=0, return_inverse=True)
+	return unique, inverse.reshape(-1).astype(numpy.uint32)
+
+
+_binarySTLRecord = numpy.dtype([("normal", "<f4", (3, )),
+                                ("vertices", "<f4", (3, 3)),
+                                ("attribute", "<u2")])
+
+
+def parseSTL(data):
+	"""Decodes a binary or ASCII STL file given as bytes or str into an (F,3)
+	array of facet normals and an (F,3,3) array of triangle vertices. Raises a
+	ValueError if an ASCII file contains non-triangular facets."""
+	if isinstance(data, (bytes, bytearray, memoryview)):
+		data = bytes(data)
+		if len(data) >= 84:
+			count = int(numpy.frombuffer(data, "<u4", 1, 80)[0])
+			if len(data) == 84 + count * _binarySTLRecord.itemsize:
+				records = numpy.frombuffer(data, _binarySTLRecord, count, 84)
+				return (records["normal"].astype(float),
+				        records["vertices"].astype(float))
+		data = data.decode()
+
+	if not data.strip():
+		return numpy.zeros((0, 3)), numpy.zeros((0, 3, 3))
+	if not re.match(r"\s*solid", data):
+		raise SyntaxError("solid expected")
+
+	normals = re.findall(r"facet\s+normal\s+(\S+)\s+(\S+)\s+(\S+)", data)
+	coords = re.findall(r"vertex\s+(\S+)\s+(\S+)\s+(\S+)", data)
+	if len(coords) != 3 * len(normals):
+		raise ValueError("STL data contains non-triangular facets")
+
+	return (numpy.array(normals, dtype=str).astype(float).reshape(-1, 3),
+	        numpy.array(coords, dtype=str).astype(float).reshape(-1, 3, 3))
+
+
 class FaceSoup:
 	def __init__(s):
 		s.faces = list()
@@ -497,7 +682,39 @@ class FaceSoup:
 		else:
 			return "FaceSoup(\n" + "\n".join("  " + str(f) for f in s.faces) + "\n)"
 
+	def copy(s):
+		"""Returns a new soup sharing this soup's (immutable) faces"""
+		res = FaceSoup()
+		res.faces = list(s.faces)
+		return res
+
+	@property
+	def nbytes(s):
+		"""Estimated memory footprint of the faces in bytes"""
+		n_vectors = sum(len(face.vertices) + 1 for face in s.faces)
+		return len(s.faces) * 128 + n_vectors * 136
+
 	def transform(s, T: M):
+		if not isinstance(T, M): T = M(T)
+		vertices = [v for face in s.faces for v in face.vertices]
+		if len(vertices) > 0 and T.dtype != object:
+			if all(len(v) == 3 for v in vertices):
+				points = numpy.array(vertices)
+			else:
+				points = numpy.array([tuple(v) + (0, ) * (3 - len(v)) for v in vertices])
+			if points.dtype != object:
+				normals = numpy.array([face.normal for face in s.faces])
+				points = list(T.applyPoints(points.astype(float)).view(V))
+				normals = T.applyPoints(normals.astype(float), w=0).view(V)
+
+				newFaces = list()
+				i = 0
+				for face, normal in zip(s.faces, normals):
+					newFaces.append(face_t(normal, tuple(points[i:i + len(face.vertices)])))
+					i += len(face.vertices)
+				s.faces = newFaces
+				return
+
 		newFaces = list()
 		for face in s.faces:
 			newFaces.append(
@@ -507,6 +724,27 @@ class FaceSoup:
 		s.faces = newFaces
 
 	def load_stl(s, code):
+		"""Appends the facets of a binary or ASCII STL file given as bytes or str"""
+		try:
+			normals, triangles = parseSTL(code)
+		except ValueError:
+			if not isinstance(code, str): code = bytes(code).decode()
+			s.load_stl_loops(code)
+			return
+		s.load_triangles(normals, triangles)
+
+	def load_triangles(s, normals, triangles):
+		"""Appends triangles given as an (F,3) array of normals and an (F,3,3)
+		array of vertices"""
+		normals = numpy.asarray(normals, dtype=float).view(V)
+		triangles = numpy.asarray(triangles, dtype=float).view(V)
+		for i in range(len(triangles)):
+			tri = triangles[i]
+			s.faces.append(face_t(normals[i], (tri[0], tri[1], tri[2])))
+
+	def load_stl_loops(s, code):
+		"""Appends the facets of an ASCII STL file, which may have an arbitrary
+		number of vertices each"""
 
 		INIT = 0
 		BODY = 1
@@ -548,6 +786,17 @@ class FaceSoup:
 				else:
 					raise SyntaxError("vertex or endloop expected")
 
+	def load_mesh(s, vertices, indices):
+		"""Appends the triangles of an indexed mesh given as an (N,3) vertex array
+		and an (F,3) index array. Face normals are computed from the winding."""
+		triangles = numpy.asarray(vertices, dtype=float)[numpy.asarray(indices)]
+		normals = numpy.cross(triangles[:, 1] - triangles[:, 0],
+		                      triangles[:, 2] - triangles[:, 0])
+		lengths = numpy.linalg.norm(normals, axis=1)
+		normals[lengths > 0] /= lengths[lengths > 0, None]
+
+		s.load_triangles(normals, triangles)
+
 	def load_svg_path(s, path):
 		vertices = list()
 		p = V(0, 0)
@@ -590,6 +839,199 @@ class FaceSoup:
 		return res / 6.0
 
 
+class _MeshFaceList(list):
+	"""The face_t list of an IndexedMesh. Modifying it marks the mesh's arrays as
+	stale, so that they are rebuilt from the faces when used next."""
+	def __init__(s, mesh, faces):
+		list.__init__(s, faces)
+		s.mesh = mesh
+
+
+def _modifyingFaces(name):
+	method = getattr(list, name)
+
+	def modify(s, *args):
+		res = method(s, *args)
+		s.mesh._stale = True
+		return res
+
+	return modify
+
+
+for _name in ("append", "extend", "insert", "pop", "remove", "clear", "sort",
+              "reverse", "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+	setattr(_MeshFaceList, _name, _modifyingFaces(_name))
+
+
+class IndexedMesh(FaceSoup):
+	"""Triangle mesh stored as an (N,3) array of welded vertices, an (F,3) array
+	of vertex indices and an optional (F,3) array of face normals, computed from
+	the winding when omitted. The faces attribute is a face_t list for code
+	written against FaceSoup; assigning or modifying it rebuilds the arrays,
+	raising a ValueError for non-triangular faces."""
+	def __init__(s, vertices=None, indices=None, normals=None):
+		if vertices is None: vertices = numpy.zeros((0, 3))
+		if indices is None: indices = numpy.zeros((0, 3), dtype=numpy.uint32)
+		s._stale = False
+		s._faces = None
+		s._vertices = numpy.asarray(vertices, dtype=float).reshape(-1, 3)
+		s._indices = numpy.asarray(indices, dtype=numpy.uint32).reshape(-1, 3)
+		s._normals = None
+		if normals is not None:
+			s._normals = numpy.asarray(normals, dtype=float).reshape(-1, 3)
+
+	@classmethod
+	def FromTriangles(cls, triangles, normals=None):
+		"""Creates a mesh from an (F,3,3) array of triangle vertices"""
+		vertices, indices = weldVertices(
+		  numpy.asarray(triangles, dtype=float).reshape(-1, 3))
+		return cls(vertices, indices, normals)
+
+	@classmethod
+	def FromFaceSoup(cls, soup):
+		"""Creates a mesh from a soup of triangular faces"""
+		if isinstance(soup, IndexedMesh):
+			return soup.copy()
+		if any(len(face.vertices) != 3 for face in soup.faces):
+			raise ValueError("cannot index non-triangular faces")
+		triangles = numpy.array([[tuple(v) for v in face.vertices]
+		                         for face in soup.faces],
+		                        dtype=float).reshape(-1, 3, 3)
+		normals = numpy.array([tuple(face.normal) for face in soup.faces],
+		                      dtype=float).reshape(-1, 3)
+		return cls.FromTriangles(triangles, normals)
+
+	def _sync(s):
+		"""Rebuilds the arrays from the faces if these were modified"""
+		if not s._stale: return
+		if any(len(face.vertices) != 3 for face in s._faces):
+			raise ValueError("cannot index non-triangular faces")
+		triangles = numpy.array([[tuple(v) for v in face.vertices]
+		                         for face in s._faces],
+		                        dtype=float).reshape(-1, 3)
+		vertices, indices = weldVertices(triangles)
+		s._vertices = vertices
+		s._indices = numpy.asarray(indices, dtype=numpy.uint32).reshape(-1, 3)
+		s._normals = numpy.array([tuple(face.normal) for face in s._faces],
+		                         dtype=float).reshape(-1, 3)
+		s._stale = False
+
+	@property
+	def vertices(s):
+		s._sync()
+		return s._vertices
+
+	@vertices.setter
+	def vertices(s, vertices):
+		s._sync()
+		s._vertices = vertices
+		s._faces = None
+
+	@property
+	def indices(s):
+		s._sync()
+		return s._indices
+
+	@indices.setter
+	def indices(s, indices):
+		s._sync()
+		s._indices = indices
+		s._faces = None
+
+	@property
+	def triangles(s):
+		"""(F,3,3) array of the vertices of each face"""
+		return s.vertices[s.indices]
+
+	@property
+	def normals(s):
+		s._sync()
+		if s._normals is None:
+			triangles = s.triangles
+			normals = numpy.cross(triangles[:, 1] - triangles[:, 0],
+			                      triangles[:, 2] - triangles[:, 0])
+			lengths = numpy.linalg.norm(normals, axis=1)
+			normals[lengths > 0] /= lengths[lengths > 0, None]
+			s._normals = normals
+		return s._normals
+
+	@property
+	def faces(s):
+		if s._faces is None:
+			soup = FaceSoup()
+			soup.load_triangles(s.normals, s.triangles)
+			s._faces = _MeshFaceList(s, soup.faces)
+		return s._faces
+
+	@faces.setter
+	def faces(s, faces):
+		faces = _MeshFaceList(s, faces)
+		if any(len(face.vertices) != 3 for face in faces):
+			raise ValueError("cannot index non-triangular faces")
+		s._faces = faces
+		s._stale = True
+		s._sync()
+
+	def copy(s):
+		"""Returns a new mesh with copies of this mesh's arrays, so that either may
+		be modified in place, e.g. a mesh returned from the geometry cache"""
+		res = IndexedMesh(s.vertices.copy(), s.indices.copy(),
+		                  None if s._normals is None else s._normals.copy())
+		if s._faces is not None:
+			res._faces = _MeshFaceList(res, s._faces)
+		return res
+
+	@property
+	def nbytes(s):
+		cb = s.vertices.nbytes + s.indices.nbytes
+		if s._normals is not None: cb += s._normals.nbytes
+		if s._faces is not None: cb += FaceSoup.nbytes.fget(s)
+		return cb
+
+	def transform(s, T: M):
+		if not isinstance(T, M): T = M(T)
+		s.vertices = T.applyPoints(s.vertices)
+		if s._normals is not None:
+			s._normals = T.applyPoints(s._normals, w=0)
+		s._faces = None
+
+	def _append(s, vertices, indices, normals):
+		if len(s.indices) > 0 and (s._normals is not None or normals is not None):
+			normals = numpy.concatenate((s.normals, normals if normals is not None
+			                             else IndexedMesh(vertices, indices).normals))
+		vertices, inverse = weldVertices(numpy.concatenate((s.vertices, vertices)))
+		indices = numpy.concatenate(
+		  (s.indices, numpy.asarray(indices, dtype=numpy.uint32) + len(s.vertices)))
+		s.vertices = vertices
+		s.indices = inverse[indices.reshape(-1)].reshape(-1, 3)
+		s._normals = normals
+		s._faces = None
+
+	def load_triangles(s, normals, triangles):
+		triangles = numpy.asarray(triangles, dtype=float).reshape(-1, 3)
+		s._append(triangles,
+		          numpy.arange(len(triangles), dtype=numpy.uint32).reshape(-1, 3),
+		          None if normals is None else numpy.asarray(normals, dtype=float))
+
+	def load_mesh(s, vertices, indices):
+		s._append(numpy.asarray(vertices, dtype=float), indices, None)
+
+	def load_stl(s, code):
+		"""Appends the facets of a binary or ASCII STL file. Raises a ValueError if
+		the file contains non-triangular facets."""
+		s.load_triangles(*parseSTL(code))
+
+	def load_stl_loops(s, code):
+		raise TypeError("indexed meshes only hold triangles")
+
+	def load_svg_path(s, path):
+		raise TypeError("indexed meshes only hold triangles")
+
+	def computeVolume(s):
+		a, b, c = (s.triangles[:, i] for i in range(3))
+		return float(numpy.sum(a * numpy.cross(b, c))) / 6.0
+
+
 class aabb_t:
 	"""Structure used to represent two or three dimensional axis-aligned bounding boxes.
 	In addition to a non-empty bounding box with extent and offset, this type
@@ -687,6 +1129,13 @@ class aabb_t:
 			if s.empty: return aabb_t.Empty()
 
 			base = [s.min, s.max]
+			if object not in (b.dtype, s.min.dtype, s.max.dtype):
+				corners = numpy.array([(base[x][0], base[y][1], base[z][2])
+				                       for x in (0, 1) for y in (0, 1) for z in (0, 1)],
+				                      dtype=float)
+				vectors = b.applyPoints(corners)
+				return aabb_t(vectors.min(axis=0), vectors.max(axis=0))
+
 			vectors = [
 			  numpy.dot(b, V(base[x].x, base[y].y, base[z].z, 1)).xyz for x in (0, 1)
 			  for y in (0, 1) for z in (0, 1)
@@ -1,5 +1,5 @@
 from .appearance import color
-from .graphinfo import DimensionVisitor, BoundingBoxVisitor
+from .graphinfo import DimensionVisitor, ImportedFilesVisitor, BoundingBoxVisitor
 from .layers import DAGLayer, previewLayer, nonpreviewLayer, LayerFilter, AllLayerFilter, NoLayerFilter, ClassLayerFilter, SubprocessLayer, LayersVisitor
 from .symbolic import variable, conditional, runtime_assertion
 from .hints import Hint, hint_cache
\ No newline at end of file
@@ -46,6 +46,18 @@ class DimensionVisitor(dag.DAGVisitor):
 		return not (s.has2dTo3d or s.has3dTo2d)
 
 
+class ImportedFilesVisitor(dag.DAGVisitor):
+	"""Collects the real paths of all files imported by geometryImport nodes.
+	Relative paths are resolved against the working directory."""
+	def __init__(s):
+		dag.DAGVisitor.__init__(s)
+		s.files = set()
+
+	def __call__(s, node):
+		if isinstance(node, primitives.geometryImport):
+			s.files.add(os.path.realpath(node.filename))
+
+
 class BoundingBoxVisitor(usability.TransformVisitor):
 	def __init__(s):
 		usability.TransformVisitor.__init__(s)
@@ -28,6 +28,10 @@ class variable(dag.DAGLeaf):
 	def SetGlobalDefault(cls, key: str, value: any):
 		_GlobalDefaults[key] = value
 
+	@classmethod
+	def GetGlobalDefaults(cls):
+		return dict(_GlobalDefaults)
+
 	@property
 	def default(s):
 		if s.ident in _GlobalDefaults:
@@ -1,3 +1,7 @@
-from .codegen import scad_repr, OpenSCADcodeGen, NodeToGeometry
+from .codegen import scad_repr, presetOverrides, OpenSCADcodeGen, NodeToGeometry
 from .baseprocesses import OpenSCADSource, OpenSCADBuild
-from .cache import SCADCache, DisabledSCADCache, DirectorySCADCache, addOpenSCADCacheArguments, RenderSCADCode, RenderSCADCode_raw
+from .cache import SCADCache, DisabledSCADCache, DirectorySCADCache, GeometryCache, RenderJob, RenderTimeoutError, RenderCancelledError, addOpenSCADCacheArguments, RenderSCADCode, RenderSCADCode_raw
+from .capabilities import capabilities_t, GetCapabilities, ProbeCapabilities, ResolveBackend
+from .benchmark import backend_benchmark_t, BenchmarkBackends
+from .remotecache import ContentStore, DirectoryContentStore, HTTPContentStore, SharedSCADCache, ServeContentStore
+from .scheduler import RenderScheduler, RenderFuture, GetDefaultScheduler
\ No newline at end of file
@@ -13,7 +13,10 @@ import subprocess
 import tempfile
 import shutil
 import pathlib
-from .cache import SCADCache, DisabledSCADCache, DirectorySCADCache, addOpenSCADCacheArguments, RenderSCADCode
+from .cache import SCADCache, DisabledSCADCache, DirectorySCADCache, addOpenSCADCacheArguments, RenderSCADCode, GetRenderNamespace
+from .scheduler import GetDefaultScheduler
+from .benchmark import BenchmarkBackends
+from concurrent.futures import Future
 
 
 class OpenSCADSource(processing.ProcessBase):
@@ -104,6 +107,9 @@ class OpenSCADBuild(processing.ProcessBase):
 	             defaultSegments=None,
 	             useCache=None,
 	             rawCache=False,
+	             timeout=None,
+	             memoryLimit=None,
+	             backend=None,
 	             *args,
 	             **kwargs):
 		processing.ProcessBase.__init__(s, *args, **kwargs)
@@ -117,6 +123,9 @@ class OpenSCADBuild(processing.ProcessBase):
 		s.defaultSegments = None
 		s.useCache = useCache
 		s.rawCache = rawCache
+		s.timeout = timeout
+		s.memoryLimit = memoryLimit
+		s.backend = backend
 
 	@classmethod
 	def RenderModule(_, m, silentFail=False, **kwargs):
@@ -144,30 +153,89 @@ class OpenSCADBuild(processing.ProcessBase):
 
 		return soup
 
-	def __call__(s, ent: processing.EntityRecord):
-
+	def generateCode(s, ent: processing.EntityRecord):
+		"""Returns the OpenSCAD code of an entity and whether it is three-dimensional"""
+		code, is3d, _ = s._generateCode(ent)
+		return code, is3d
+
+	def _generateCode(s, ent: processing.EntityRecord):
+		"""Like generateCode, additionally returning the customizer variables"""
+		node = ent.node
+
+		with processing.profiling.phase("codegen"):
+			vcodegen = codegen.OpenSCADcodeGen(layerFilter=s.layerFilter,
+			                                   processPreview=s.processPreview,
+			                                   useSegmentCount=s.useSegmentCount)
+			node.visitDescendants(vcodegen)
+			vcodegen.finish()
+
+		with processing.profiling.phase("dimensions"):
+			vdim = metadata.DimensionVisitor()
+			node.visitDescendants(vdim)
+
+		with processing.profiling.phase("codegen"):
+			# the code only names imported files, their hashes make render cache
+			# entries and build manifest digests follow changes of their contents
+			vimports = metadata.ImportedFilesVisitor()
+			node.visitDescendants(vimports)
+
+			digests = set()
+			for fn in vimports.files:
+				if os.path.isfile(fn):
+					digests.add(processing.manifest.cachedFileDigest(fn))
+			code = "".join(f"// import {digest}\n" for digest in sorted(digests))
+			if s.defaultSegments is not None:
+				code += (f"$fn={codegen.scad_repr(s.defaultSegments)};")
+			code += (vcodegen.code)
+		processing.profiling.count("code bytes", len(code))
+
+		return code, vdim.has3d or vdim.empty, vcodegen.variable_list
+
+	def _renderArguments(s):
+		return dict(rawCache=s.rawCache,
+		            useCache=s.useCache,
+		            decode=s.outputGeometry,
+		            outputFormat=s.outputFormat,
+		            timeout=s.timeout,
+		            memoryLimit=s.memoryLimit,
+		            backend=s.backend,
+		            binarySTL=s._binarySTL())
+
+	def _binarySTL(s):
+		"""Binary STL is only requested for results that are not handed out, the
+		files written and raw data returned stay ASCII"""
+		return not (s.outputFile or s.outputRaw)
+
+	def _manifestParameters(s, is3d):
+		"""Process parameters recorded in the build manifest, which determine the
+		output files along with the code"""
+		return dict(process=type(s).__name__,
+		            outputFormat=s.outputFormat,
+		            is3d=bool(is3d),
+		            namespace=GetRenderNamespace(backend=s.backend,
+		                                         binarySTL=s._binarySTL()))
+
+	def _manifestDigest(s, code, is3d):
+		"""Returns the build manifest of the output directory and the digest of
+		this build, or (None, None) if results are needed in memory and the build
+		cannot be skipped"""
+		if not s.outputFile or s.outputGeometry or s.outputRaw:
+			return None, None
+		return (processing.GetManifest(s.getOutputDirectory(True)),
+		        processing.buildDigest(code, s._manifestParameters(is3d)))
+
+	def _skippedResults(s, manifest, ent: processing.EntityRecord, digest):
+		"""Returns the results of an up to date build, or None"""
+		if manifest is None: return None
+		files = manifest.upToDate(ent.name, digest)
+		if files is None: return None
 		res = processing.ProcessResults()
+		res.files += files
+		res.skipped = True
+		return res
 
-		vcodegen = codegen.OpenSCADcodeGen(layerFilter=s.layerFilter,
-		                                   processPreview=s.processPreview,
-		                                   useSegmentCount=s.useSegmentCount)
-		ent.node.visitDescendants(vcodegen)
-		vcodegen.finish()
-
-		vdim = metadata.DimensionVisitor()
-		ent.node.visitDescendants(vdim)
-
-		code = ""
-		if s.defaultSegments is not None:
-			code += (f"$fn={codegen.scad_repr(s.defaultSegments)};")
-		code += (vcodegen.code)
-
-		raw = RenderSCADCode(code,
-		                     vdim.has3d or vdim.empty,
-		                     rawCache=s.rawCache,
-		                     useCache=s.useCache,
-		                     decode=s.outputGeometry,
-		                     outputFormat=s.outputFormat)
+	def _collectResults(s, ent: processing.EntityRecord, raw, is3d):
+		res = processing.ProcessResults()
 
 		if s.outputGeometry:
 			raw_data, res.data["geometry"] = raw
@@ -176,7 +244,7 @@ class OpenSCADBuild(processing.ProcessBase):
 
 		if s.outputFormat is not None:
 			extension = s.outputFormat
-		elif vdim.has3d or vdim.empty:
+		elif is3d:
 			extension = ".stl"
 		else:
 			extension = ".svg"
@@ -187,7 +255,7 @@ class OpenSCADBuild(processing.ProcessBase):
 			fn_out = "out" + extension
 
 		if s.outputFile:
-			with open(fn_out, "wb") as f:
+			with processing.profiling.phase("export"), open(fn_out, "wb") as f:
 				f.write(raw_data)
 		if s.outputRaw:
 			res.data["raw"] = raw_data
@@ -196,3 +264,78 @@ class OpenSCADBuild(processing.ProcessBase):
 			res.files.append(fn_out)
 
 		return res
+
+	def submit(s, ent: processing.EntityRecord, scheduler=None):
+		"""Generates the entity's code right away and schedules its render,
+		returning a future of the ProcessResults. The DAG may be modified as soon
+		as this returns."""
+		if scheduler is None:
+			scheduler = GetDefaultScheduler()
+
+		code, is3d = s.generateCode(ent)
+		return s._submitCode(ent, code, is3d, scheduler)
+
+	def submitPresets(s, ent: processing.EntityRecord, presets, scheduler=None):
+		"""Builds an entity for several customizer presets (a dict of preset names
+		to dicts of variable values) from a single code generation: each preset is
+		rendered concurrently from the same code with its variables overridden, as
+		openscad -D does. The results are named like the copies built by climain
+		for presets, i.e. <entity>-<preset>. Returns a dict of preset names to
+		futures of the ProcessResults.
+
+		Only correct for entities depending on presets solely through their
+		metadata.variable symbols, not through defaults read in Python."""
+		if scheduler is None:
+			scheduler = GetDefaultScheduler()
+
+		with processing.profiling.entity(ent.name, False):
+			code, is3d, variables = s._generateCode(ent)
+		res = dict()
+		for presetName, values in presets.items():
+			copy = ent.namedCopy(f"{ent.name}-{presetName}")
+			with processing.profiling.entity(copy.name, False):
+				res[presetName] = s._submitCode(
+				  copy, code + codegen.presetOverrides(variables, values), is3d,
+				  scheduler)
+		return res
+
+	def _submitCode(s, ent: processing.EntityRecord, code, is3d, scheduler):
+		manifest, digest = s._manifestDigest(code, is3d)
+		res = Future()
+		skipped = s._skippedResults(manifest, ent, digest)
+		if skipped is not None:
+			res.set_result(skipped)
+			return res
+
+		render = scheduler.submit(code, is3d, **s._renderArguments())
+
+		def done(f):
+			try:
+				results = s._collectResults(ent, f.result(), is3d)
+				if manifest is not None:
+					manifest.record(ent.name, digest, results.files,
+					                s._manifestParameters(is3d))
+				res.set_result(results)
+			except BaseException as e:
+				res.set_exception(e)
+
+		render.add_done_callback(processing.profiling.bind(done))
+		return res
+
+	def benchmarkBackends(s, ent: processing.EntityRecord, backends=None, **kwargs):
+		"""Renders the entity under each geometry backend, see BenchmarkBackends"""
+		code, is3d = s.generateCode(ent)
+		return BenchmarkBackends(code, is3d, backends, **kwargs)
+
+	def __call__(s, ent: processing.EntityRecord):
+		code, is3d = s.generateCode(ent)
+		manifest, digest = s._manifestDigest(code, is3d)
+		res = s._skippedResults(manifest, ent, digest)
+		if res is not None:
+			return res
+
+		raw = RenderSCADCode(code, is3d, **s._renderArguments())
+		res = s._collectResults(ent, raw, is3d)
+		if manifest is not None:
+			manifest.record(ent.name, digest, res.files, s._manifestParameters(is3d))
+		return res
@@ -0,0 +1,84 @@
+from .cache import RenderSCADCode
+from .capabilities import GetCapabilities, ResolveBackend
+from ..math import *
+from collections import namedtuple
+import time
+
+backend_benchmark_t = namedtuple(
+  "backend_benchmark_t",
+  "backend wallTime volume bounds equivalent error")
+
+
+def _soupBounds(soup):
+	if isinstance(soup, IndexedMesh):
+		points = soup.vertices
+	else:
+		points = numpy.array(
+		  [tuple(v) for face in soup.faces for v in face.vertices], dtype=float)
+	if len(points) < 1:
+		return aabb_t.Empty()
+	return aabb_t(points.min(axis=0), points.max(axis=0))
+
+
+def _equivalent(a, b, tolerance):
+	"""Checks whether two benchmark results describe the same geometry within a
+	relative tolerance"""
+	if a.bounds.empty or b.bounds.empty:
+		return a.bounds.empty and b.bounds.empty
+	scale = max(1.0, float(numpy.max(numpy.abs(a.bounds.extent))))
+	if numpy.max(numpy.abs(a.bounds.min - b.bounds.min)) > tolerance * scale:
+		return False
+	if numpy.max(numpy.abs(a.bounds.max - b.bounds.max)) > tolerance * scale:
+		return False
+	if a.volume is not None and b.volume is not None:
+		if abs(a.volume - b.volume) > tolerance * max(1.0, abs(a.volume)):
+			return False
+	return True
+
+
+def BenchmarkBackends(code, is3d, backends=None, repeat=1, tolerance=1e-4):
+	"""Renders a piece of OpenSCAD code under each geometry backend (all backends
+	offered by the installed binary by default) and returns a list of
+	backend_benchmark_t records. wallTime is the best of `repeat` uncached
+	renders. Each result is compared against the first successful one by volume
+	and bounding box."""
+	if backends is None:
+		backends = GetCapabilities().backends or (None, )
+	backends = [ResolveBackend(backend) for backend in backends]
+
+	res = list()
+	reference = None
+	for backend in backends:
+		wallTime = None
+		soup = None
+		error = None
+		for _ in range(max(1, repeat)):
+			t0 = time.time()
+			try:
+				_, soup = RenderSCADCode(code,
+				                         is3d,
+				                         useCache=False,
+				                         decode=True,
+				                         geometryCache=False,
+				                         backend=backend)
+			except RuntimeError as e:
+				error = e
+				break
+			dt = time.time() - t0
+			wallTime = dt if wallTime is None else min(wallTime, dt)
+
+		if error is not None:
+			res.append(backend_benchmark_t(backend, None, None, None, False, error))
+			continue
+
+		record = backend_benchmark_t(backend, wallTime,
+		                             soup.computeVolume() if is3d else None,
+		                             _soupBounds(soup), True, None)
+		if reference is None:
+			reference = record
+		else:
+			record = record._replace(
+			  equivalent=_equivalent(reference, record, tolerance))
+		res.append(record)
+
+	return res
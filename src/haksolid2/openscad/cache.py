@@ -4,31 +4,167 @@ import hashlib
 import pathlib
 import shutil
 import json
+import re
 from ..math import *
+from .capabilities import GetCapabilities, ResolveBackend
+from ..processing import profiling
 import time
 import os
+import sys
+import zlib
+import lzma
+import threading
+import functools
+from collections import OrderedDict
+import signal
+import atexit
+import contextlib
+try:
+	import resource
+except ImportError:
+	resource = None
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+
+def codeDigest(code, namespace=""):
+	"""Returns the cache key of a piece of code rendered within a namespace (see
+	GetRenderNamespace). The empty namespace yields the legacy, code-only key."""
+	if namespace:
+		code = namespace + "\0" + code
+	return hashlib.sha256(code.encode()).hexdigest()
+
+
+class RenderTimeoutError(RuntimeError):
+	"""Raised when an OpenSCAD process exceeds its wall-clock timeout"""
+	def __init__(s, timeout, message=None):
+		RuntimeError.__init__(
+		  s, message or f"OpenSCAD render exceeded its timeout of {timeout}s")
+		s.timeout = timeout
+
+
+class RenderCancelledError(RuntimeError):
+	"""Raised when a render is cancelled through its RenderJob"""
+	pass
+
+
+def _killProcess(process):
+	"""Kills a render process along with any children it spawned, as OpenSCAD is
+	often installed behind a wrapper script"""
+	try:
+		os.killpg(process.pid, signal.SIGKILL)
+	except (AttributeError, OSError):
+		process.kill()
+
+
+class RenderJob:
+	"""Handle to a running render. Cancelling it kills the OpenSCAD process, or
+	prevents it from starting if it has not been spawned yet."""
+	def __init__(s):
+		s.cancelled = False
+		s._process = None
+		s._lock = threading.Lock()
+
+	def attach(s, process):
+		with s._lock:
+			s._process = process
+			if s.cancelled:
+				_killProcess(process)
+
+	def detach(s):
+		with s._lock:
+			s._process = None
+
+	def cancel(s):
+		with s._lock:
+			s.cancelled = True
+			if s._process is not None and s._process.poll() is None:
+				_killProcess(s._process)
 
 
 class SCADCache:
-	def lookup(s, code):
+	def lookup(s, code, namespace=""):
 		raise NotImplementedError()
 
-	def store(s, code, result, is3d):
+	def lookupTimeout(s, code, namespace=""):
+		"""Returns the timeout in seconds a previous render of this code exceeded,
+		or None if it is not known to time out."""
+		return None
+
+	def lookupMesh(s, code, namespace=""):
+		"""Returns the (vertices, indices) arrays of a cached 3D result, or None if
+		the cache cannot provide decoded geometry for it."""
+		return None
+
+	def store(s, code, result, is3d, renderTime, namespace="", timeout=None):
 		raise NotImplementedError()
 
 
 class DisabledSCADCache(SCADCache):
-	def lookup(s, code):
+	def lookup(s, code, namespace=""):
 		return None, None
 
-	def store(s, code, result, is3d):
+	def store(s, code, result, is3d, renderTime, namespace="", timeout=None):
 		pass
 
 
+def _synchronized(method):
+	@functools.wraps(method)
+	def wrapper(s, *args, **kwargs):
+		with s._lock, s._directoryLock():
+			return method(s, *args, **kwargs)
+
+	return wrapper
+
+
 class DirectorySCADCache(SCADCache):
-	def __init__(s, fn):
+	"""Render cache storing results as files in a directory, indexed by meta.json.
+	Results are stored compressed (see Compression), 3D results additionally as
+	an indexed binary mesh that decodes without parsing STL. If a byte or entry
+	budget is configured, the least valuable entries (see evictionScore) are
+	evicted whenever a new result is stored."""
+
+	DefaultMaxBytes = None
+	DefaultMaxEntries = None
+	Compression = "zlib"
+	RecencyHalfLife = 7 * 24 * 3600
+	EntryOverhead = 256
+
+	def __init__(s, fn, maxBytes=None, maxEntries=None):
 		s._fn = pathlib.Path(fn)
 		s._fn_meta = s._fn / "meta.json"
+		s.maxBytes = maxBytes if maxBytes is not None else s.DefaultMaxBytes
+		s.maxEntries = (maxEntries
+		                if maxEntries is not None else s.DefaultMaxEntries)
+		s._lock = threading.RLock()
+		s._lockDepth = 0
+
+	@contextlib.contextmanager
+	def _directoryLock(s):
+		"""Holds an advisory lock on the cache directory, so that several build
+		processes can share it (see climain's -j). Reentrant within the thread
+		holding s._lock."""
+		if fcntl is None or s._lockDepth > 0:
+			s._lockDepth += 1
+			try:
+				yield
+			finally:
+				s._lockDepth -= 1
+			return
+
+		os.makedirs(s._fn, exist_ok=True)
+		with open(s._fn / "meta.lock", "a") as f:
+			fcntl.flock(f, fcntl.LOCK_EX)
+			s._lockDepth += 1
+			try:
+				yield
+			finally:
+				s._lockDepth -= 1
+
+	def digest(s, code, namespace=""):
+		return codeDigest(code, namespace)
 
 	def getMeta(s, key=None, create=True):
 		if s._fn_meta.exists():
@@ -46,17 +182,21 @@ class DirectorySCADCache(SCADCache):
 
 	def setMeta(s, meta):
 		if not s._fn.exists():
-			os.makedirs(s._fn)
-		with open(s._fn_meta, "w") as f:
+			os.makedirs(s._fn, exist_ok=True)
+		fn_tmp = s._fn / f"meta.json.{os.getpid()}.{threading.get_ident()}"
+		with open(fn_tmp, "w") as f:
 			json.dump(meta, f)
+		os.replace(fn_tmp, s._fn_meta)
 
-	def lookup(s, code):
-		digest = hashlib.sha256(code.encode()).hexdigest()
+	@_synchronized
+	def lookup(s, code, namespace=""):
+		digest = s.digest(code, namespace)
 		fn_result = s._fn / f"{digest}.dat"
 		meta, entry = s.getMeta(digest, False)
 		if entry is None: return None, None
 
 		if not entry["success"]:
+			if entry.get("timeout") is not None: return None, None
 			return b"", None
 
 		if not fn_result.exists(): return None, None
@@ -67,89 +207,512 @@ class DirectorySCADCache(SCADCache):
 		s.setMeta(meta)
 
 		with open(fn_result, "rb") as f:
-			raw = f.read()
+			raw = _decompress(entry.get("encoding", "raw"), f.read())
 
 		return raw, entry["is3d"]
 
-	def store(s, code, result, is3d, renderTime):
-		digest = hashlib.sha256(code.encode()).hexdigest()
+	@_synchronized
+	def lookupMesh(s, code, namespace=""):
+		digest = s.digest(code, namespace)
+		fn_mesh = s._fn / f"{digest}.mesh"
+		meta, entry = s.getMeta(digest, False)
+		if entry is None or not entry.get("mesh", False): return None
+		if not fn_mesh.exists(): return None
+
+		with open(fn_mesh, "rb") as f:
+			return _decodeMesh(_decompress(entry["encoding"], f.read()))
+
+	@_synchronized
+	def lookupTimeout(s, code, namespace=""):
+		meta, entry = s.getMeta(s.digest(code, namespace), False)
+		if entry is None or entry["success"]: return None
+		return entry.get("timeout")
+
+	@_synchronized
+	def store(s, code, result, is3d, renderTime, namespace="", timeout=None):
+		digest = s.digest(code, namespace)
 		fn_result = s._fn / f"{digest}.dat"
+		fn_mesh = s._fn / f"{digest}.mesh"
 
 		meta, entry = s.getMeta(digest, True)
 		entry["success"] = result is not None
 		if result is not None: # successful compilation
 			if not s._fn.exists():
-				os.makedirs(s._fn)
+				os.makedirs(s._fn, exist_ok=True)
+			payload = _compress(s.Compression, result)
 			with open(fn_result, "wb") as f:
-				f.write(result)
+				f.write(payload)
+			entry["encoding"] = s.Compression
 			entry["is3d"] = bool(is3d)
-			entry["cb"] = len(result)
+			entry["cb"] = len(payload)
+			entry["cbRaw"] = len(result)
+
+			entry["mesh"] = False
+			if is3d:
+				try:
+					mesh = _compress(s.Compression, _encodeMesh(*_stlMesh(result)))
+				except ValueError:
+					mesh = None
+				if mesh is not None:
+					with open(fn_mesh, "wb") as f:
+						f.write(mesh)
+					entry["mesh"] = True
+					entry["cb"] += len(mesh)
+			if not entry["mesh"] and fn_mesh.exists():
+				fn_mesh.unlink()
 		entry["usageCount"] = 0
 		entry["lastUsed"] = 0
 		entry["written"] = time.time()
 		entry["renderTime"] = renderTime
+		entry["namespace"] = namespace
+		if timeout is not None:
+			entry["timeout"] = timeout
+		else:
+			entry.pop("timeout", None)
+
+		if s.maxBytes is not None or s.maxEntries is not None:
+			s._evict(meta, s.maxBytes, s.maxEntries, keep={digest})
 
 		s.setMeta(meta)
 
+	def evictionScore(s, entry, now=None):
+		"""Returns the value of keeping an entry, lower scores are evicted first.
+		The score grows with the recorded render time, the usage count and the
+		recency of use and shrinks with the size of the stored result."""
+		if now is None:
+			now = time.time()
+		cost = entry.get("renderTime") or 0
+		uses = entry.get("usageCount", 0)
+		age = max(0, now - max(entry.get("lastUsed", 0), entry.get("written", 0)))
+		recency = 0.5**(age / s.RecencyHalfLife)
+		size = entry.get("cb", 0) + s.EntryOverhead
+		return (cost + 1e-3) * (1 + uses) * recency / size
+
+	def _remove(s, meta, digest):
+		meta["entries"].pop(digest)
+		for fn_result in (s._fn / f"{digest}.dat", s._fn / f"{digest}.mesh"):
+			if fn_result.exists():
+				fn_result.unlink()
+
+	def _evict(s, meta, maxBytes, maxEntries, keep=()):
+		entries = meta["entries"]
+		now = time.time()
+		cb_total = sum(entry.get("cb", 0) for entry in entries.values())
+
+		evicted = list()
+		for digest in sorted(entries,
+		                     key=lambda k: s.evictionScore(entries[k], now)):
+			if ((maxBytes is None or cb_total <= maxBytes) and
+			    (maxEntries is None or len(entries) <= maxEntries)):
+				break
+			if digest in keep: continue
+			cb_total -= entries[digest].get("cb", 0)
+			s._remove(meta, digest)
+			evicted.append(digest)
+
+		return evicted
+
+	@_synchronized
+	def namespaces(s):
+		"""Returns a dictionary mapping each namespace present in the cache to its
+		number of entries and their size in bytes. Entries written before
+		namespaces were introduced are listed under the empty namespace."""
+		res = dict()
+		for entry in s.getMeta()["entries"].values():
+			count, cb = res.get(entry.get("namespace", ""), (0, 0))
+			res[entry.get("namespace", "")] = (count + 1, cb + entry.get("cb", 0))
+		return res
+
+	@_synchronized
+	def evictNamespace(s, namespace):
+		"""Removes all entries of a namespace, e.g. those rendered by an OpenSCAD
+		version no longer installed. Returns the list of evicted digests."""
+		meta = s.getMeta()
+		evicted = [
+		  digest for digest, entry in meta["entries"].items()
+		  if entry.get("namespace", "") == namespace
+		]
+		for digest in evicted:
+			s._remove(meta, digest)
+		s.setMeta(meta)
+		return evicted
+
+	@_synchronized
+	def gc(s, maxBytes=None, maxEntries=None):
+		"""Applies the eviction policy until the cache fits into the given budget,
+		defaulting to the one configured for this cache. Result files without a
+		meta entry are removed as well. Returns the list of evicted digests."""
+		if maxBytes is None: maxBytes = s.maxBytes
+		if maxEntries is None: maxEntries = s.maxEntries
+
+		if not s._fn.exists(): return list()
+
+		meta = s.getMeta()
+		evicted = s._evict(meta, maxBytes, maxEntries)
+
+		for fn_result in list(s._fn.glob("*.dat")) + list(s._fn.glob("*.mesh")):
+			if fn_result.stem not in meta["entries"]:
+				fn_result.unlink()
+				if fn_result.stem not in evicted:
+					evicted.append(fn_result.stem)
+
+		s.setMeta(meta)
+		return evicted
+
+
+class GeometryCache:
+	"""In-process LRU of decoded render results placed in front of the SCADCache.
+	Entries are keyed by code digest and dimensionality and accounted by the size
+	of the raw payload plus the estimated size of the decoded geometry."""
+	def __init__(s, maxBytes=256 * 1024 * 1024):
+		s.maxBytes = maxBytes
+		s.cb = 0
+		s.hits = 0
+		s.misses = 0
+		s._entries = OrderedDict()
+		s._lock = threading.Lock()
+
+	def __len__(s):
+		return len(s._entries)
+
+	def lookup(s, key):
+		with s._lock:
+			entry = s._entries.get(key)
+			if entry is None:
+				s.misses += 1
+				return None
+			s._entries.move_to_end(key)
+			s.hits += 1
+		raw, soup, _ = entry
+		return raw, soup.copy()
+
+	def store(s, key, raw, soup):
+		cb = len(raw) + soup.nbytes
+		if cb > s.maxBytes: return
+		with s._lock:
+			if key in s._entries:
+				s.cb -= s._entries.pop(key)[2]
+			s._entries[key] = (raw, soup.copy(), cb)
+			s.cb += cb
+			while s.cb > s.maxBytes:
+				_, (_, _, cb_evicted) = s._entries.popitem(last=False)
+				s.cb -= cb_evicted
+
+	def clear(s):
+		with s._lock:
+			s._entries.clear()
+			s.cb = 0
+
+
+DefaultGeometryCache = GeometryCache()
+
+_codecs = {
+  "raw": (lambda data: data, lambda data: data),
+  "zlib": (zlib.compress, zlib.decompress),
+  "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+def _compress(encoding, data):
+	return _codecs[encoding][0](data)
+
+
+def _decompress(encoding, data):
+	return _codecs[encoding][1](data)
+
+
+_mesh_magic = b"HSM1"
+_mesh_header = numpy.dtype([("magic", "S4"), ("vertices", "<u4"),
+                            ("faces", "<u4")])
+
+
+def _stlMesh(raw):
+	"""Returns the welded (vertices, indices) arrays of an STL file"""
+	try:
+		_, triangles = parseSTL(raw)
+	except SyntaxError as e:
+		raise ValueError(str(e))
+	vertices, indices = weldVertices(triangles.reshape(-1, 3))
+	return vertices, indices.reshape(-1, 3)
+
+
+def _encodeMesh(vertices, indices):
+	header = numpy.array([(_mesh_magic, len(vertices), len(indices))],
+	                     dtype=_mesh_header)
+	return (header.tobytes() + vertices.astype("<f8").tobytes() +
+	        indices.astype("<u4").tobytes())
+
+
+def _decodeMesh(data):
+	header = numpy.frombuffer(data, dtype=_mesh_header, count=1)[0]
+	if header["magic"] != _mesh_magic:
+		raise ValueError("not a cached mesh")
+	offset = _mesh_header.itemsize
+	n_vertices, n_faces = int(header["vertices"]), int(header["faces"])
+	vertices = numpy.frombuffer(data, dtype="<f8", count=n_vertices * 3,
+	                            offset=offset).reshape(-1, 3)
+	offset += vertices.nbytes
+	indices = numpy.frombuffer(data, dtype="<u4", count=n_faces * 3,
+	                           offset=offset).reshape(-1, 3)
+	return vertices, indices
+
 
 DefaultCache = None
+_defaultCacheLock = threading.Lock()
 
 
 def GetDefaultCache():
+	"""Returns the cache used for rawCache=True renders: the .scadcache directory
+	next to the main script. If the HAKSOLID2_SHARED_CACHE environment variable
+	names an http(s) URL or a directory, that shared store is layered below."""
 	global DefaultCache
-	if DefaultCache is None:
-		import main
-		if hasattr(main, "__file__"):
-			DefaultCache = DirectorySCADCache(
-			  pathlib.Path(main.__file__).resolve().parent / ".scadcache")
-		else:
-			DefaultCache = DisabledSCADCache()
+	with _defaultCacheLock:
+		if DefaultCache is None:
+			import main
+			if hasattr(main, "__file__"):
+				DefaultCache = DirectorySCADCache(
+				  pathlib.Path(main.__file__).resolve().parent / ".scadcache")
+				shared = os.environ.get("HAKSOLID2_SHARED_CACHE")
+				if shared:
+					from . import remotecache
+					if re.match("https?://", shared):
+						store = remotecache.HTTPContentStore(shared)
+					else:
+						store = remotecache.DirectoryContentStore(shared)
+					DefaultCache = remotecache.SharedSCADCache(DefaultCache, store)
+			else:
+				DefaultCache = DisabledSCADCache()
 	return DefaultCache
 
 
+def GetRenderNamespace(useCache=None, backend=None, binarySTL=True):
+	"""Returns the cache key namespace for results rendered by the installed
+	OpenSCAD binary with the given options."""
+	namespace = f"openscad-{GetCapabilities().version}"
+	if useCache is not None:
+		namespace += " --cache=file" if useCache else " --cache=none"
+	if backend is not None:
+		namespace += f" --backend={ResolveBackend(backend)}"
+	if _binarySTL(binarySTL):
+		namespace += " binstl"
+	return namespace
+
+
 def addOpenSCADCacheArguments(cmdline, useCache):
 	if useCache is None:
-		p = subprocess.run(["openscad", "--help"], stderr=subprocess.PIPE)
-		if re.match(".*--cache[ \\t]+arg.*", p.stderr.decode(), re.DOTALL):
-			useCache = True
-		else:
-			useCache = False
+		useCache = GetCapabilities().cache
 	if useCache:
 		return True, cmdline + ["--cache", "file"]
 	else:
 		return False, cmdline
 
 
-def RenderSCADCode_raw(code, fb, useCache=None):
-	fn_tmp = tempfile.mkdtemp()
-	cwd = os.getcwd()
+def addOpenSCADBackendArguments(cmdline, backend):
+	if backend is None:
+		return cmdline
+	return cmdline + ["--backend", ResolveBackend(backend)]
+
+
+# directories preferred for render scratch files, the first writable one is
+# used and the system's temporary directory otherwise
+ScratchRoots = ["/dev/shm"]
+
+# stream code and results through pipes if the installed OpenSCAD supports it
+UsePipes = True
+
+# request binary rather than ASCII STL if the installed OpenSCAD supports it,
+# for renders whose results are not written to output files (see binarySTL)
+UseBinarySTL = True
+
+_scratch = threading.local()
+_scratchDirectories = list()
+_scratchLock = threading.Lock()
+_forked = False
+
+
+def _scratchDirectory():
+	"""Returns the calling thread's scratch directory, which is reused by all of
+	the thread's renders and placed on a RAM-backed file system if possible"""
+	fn = getattr(_scratch, "fn", None)
+	if fn is not None and os.path.isdir(fn):
+		return fn
+
+	root = None
+	for candidate in ScratchRoots:
+		if os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+			root = candidate
+			break
+
+	fn = tempfile.mkdtemp(prefix="haksolid2-", dir=root)
+	_scratch.fn = fn
+	with _scratchLock:
+		_scratchDirectories.append(fn)
+	if _forked or _multiprocessingChild():
+		# multiprocessing workers exit without running atexit handlers
+		import multiprocessing.util
+		multiprocessing.util.Finalize(None,
+		                              shutil.rmtree,
+		                              args=(fn, ),
+		                              kwargs={"ignore_errors": True},
+		                              exitpriority=0)
+	return fn
+
+
+@atexit.register
+def _removeScratchDirectories():
+	with _scratchLock:
+		for fn in _scratchDirectories:
+			shutil.rmtree(fn, ignore_errors=True)
+		_scratchDirectories.clear()
+
+
+def _multiprocessingChild():
+	multiprocessing = sys.modules.get("multiprocessing")
+	return multiprocessing is not None and multiprocessing.parent_process(
+	) is not None
+
+
+def _resetScratchAfterFork():
+	"""Gives a forked process (e.g. a build worker of climain -j) its own scratch
+	directories"""
+	global _scratchLock, _forked
+	_scratch.fn = None
+	_scratchLock = threading.Lock()
+	_scratchDirectories.clear()
+	_forked = True
+
+
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child=_resetScratchAfterFork)
+
+
+def _binarySTL(binarySTL=True):
+	return (binarySTL and UseBinarySTL and
+	        "binstl" in GetCapabilities().exportFormats)
+
+
+def _pipeFormat(fb, binarySTL=True):
+	"""Returns the --export-format argument used to stream a result of the given
+	file name to stdout, or None if it has to be written to a file"""
+	if not UsePipes: return None
+	caps = GetCapabilities()
+	# reading from stdin and writing to stdout were introduced with 2021.01
+	if caps.versionTuple < (2021, 1) or "asciistl" not in caps.exportFormats:
+		return None
+	extension = os.path.splitext(fb)[1]
+	if extension == ".stl":
+		return "binstl" if _binarySTL(binarySTL) else "asciistl"
+	elif extension == ".svg":
+		return "svg"
+	return None
+
+
+def _limitMemory(p, memoryLimit):
+	"""Restricts the address space of a started child process. Renders run on
+	scheduler threads, where a preexec_fn is unsafe, so the limit is applied from
+	the parent where the platform supports it (Linux)."""
+	if memoryLimit is None or not hasattr(resource, "prlimit"): return
 	try:
-		os.chdir(fn_tmp)
-		with open("code.scad", "w") as f:
-			f.write(code)
+		resource.prlimit(p.pid, resource.RLIMIT_AS, (memoryLimit, memoryLimit))
+	except (ProcessLookupError, PermissionError): # exited already
+		pass
 
-		_, cmdline = addOpenSCADCacheArguments(["openscad", "-o", fb, "code.scad"],
-		                                       useCache)
 
-		p = subprocess.Popen(cmdline,
-		                     stdout=subprocess.PIPE,
-		                     stderr=subprocess.PIPE)
+def RenderSCADCode_raw(code,
+                       fb,
+                       useCache=None,
+                       timeout=None,
+                       memoryLimit=None,
+                       job=None,
+                       backend=None,
+                       binarySTL=True):
+	"""Renders a piece of OpenSCAD code into a file of the given name and returns
+	its contents. OpenSCAD runs in a per-thread scratch directory (see
+	ScratchRoots) which is passed as working directory, so the process-wide
+	working directory is never changed and renders may run from multiple
+	threads. Where supported, code and result are streamed through pipes instead
+	of files.
+
+	timeout limits the wall-clock time of the process in seconds, raising a
+	RenderTimeoutError when exceeded. memoryLimit caps its address space in bytes
+	where the platform supports it. Passing a RenderJob allows cancelling the
+	render from another thread. backend selects one of the geometry backends
+	reported by GetCapabilities, e.g. Manifold. binarySTL=False requests ASCII
+	STL files, e.g. for output files."""
+	if job is not None and job.cancelled:
+		raise RenderCancelledError("render cancelled before it started")
+
+	fn_tmp = _scratchDirectory()
+	fn_out = os.path.join(fn_tmp, fb)
+	pipeFormat = _pipeFormat(fb, binarySTL)
+
+	if pipeFormat is not None:
+		cmdline = ["openscad", "--export-format", pipeFormat, "-o", "-", "-"]
+		stdin = code.encode()
+	else:
+		fn_code = os.path.join(fn_tmp, "code.scad")
+		with open(fn_code, "w") as f:
+			f.write(code)
+		if os.path.exists(fn_out):
+			os.unlink(fn_out)
+		cmdline = ["openscad", "-o", fn_out, fn_code]
+		if fb.endswith(".stl") and _binarySTL(binarySTL):
+			cmdline += ["--export-format", "binstl"]
+		stdin = None
+
+	_, cmdline = addOpenSCADCacheArguments(cmdline, useCache)
+	cmdline = addOpenSCADBackendArguments(cmdline, backend)
+
+	p = subprocess.Popen(cmdline,
+	                     cwd=fn_tmp,
+	                     stdin=subprocess.PIPE if stdin is not None else None,
+	                     stdout=subprocess.PIPE,
+	                     stderr=subprocess.PIPE,
+	                     start_new_session=os.name == "posix")
+	_limitMemory(p, memoryLimit)
+
+	if job is not None: job.attach(p)
+	try:
+		with profiling.phase("openscad"):
+			(sout, serr) = p.communicate(stdin, timeout=timeout)
+	except subprocess.TimeoutExpired:
+		_killProcess(p)
+		p.communicate()
+		raise RenderTimeoutError(timeout)
+	except BaseException:
+		# e.g. KeyboardInterrupt, which does not reach the process as it runs in
+		# its own session
+		_killProcess(p)
+		p.communicate()
+		raise
+	finally:
+		if job is not None: job.detach()
 
-		(_, serr) = p.communicate()
+	if job is not None and job.cancelled:
+		raise RenderCancelledError("render cancelled")
 
-		if p.returncode != 0:
-			raise RuntimeError("error compiling OpenSCAD code: \n" + serr.decode())
+	if p.returncode != 0:
+		raise RuntimeError("error compiling OpenSCAD code: \n" + serr.decode())
 
-		with open(fb, "rb") as f:
-			raw_data = f.read()
+	if pipeFormat is not None:
+		return sout
 
-	finally:
-		os.chdir(cwd)
-		shutil.rmtree(fn_tmp)
+	with open(fn_out, "rb") as f:
+		raw_data = f.read()
+	os.unlink(fn_out)
 
 	return raw_data
 
 
+def _profileRender(code, namespace, source, raw_data, seconds=None):
+	"""Records a render of the entity being profiled, see profiling.render"""
+	if not profiling.Profiling: return
+	profiling.render(digest=codeDigest(code, namespace),
+	                 source=source,
+	                 bytes=len(raw_data),
+	                 seconds=seconds)
+
+
 def RenderSCADCode(code,
                    is3d,
                    rawCache=None,
@@ -157,7 +720,13 @@ def RenderSCADCode(code,
                    decode=False,
                    outputFormat=None,
                    cacheOnly=False,
-                   referenceCode=None):
+                   referenceCode=None,
+                   geometryCache=True,
+                   timeout=None,
+                   memoryLimit=None,
+                   job=None,
+                   backend=None,
+                   binarySTL=True):
 	if rawCache is None:
 		rawCache = DisabledSCADCache()
 	elif isinstance(rawCache, SCADCache):
@@ -175,11 +744,43 @@ def RenderSCADCode(code,
 		if decode:
 			raise RuntimeError(f"cannot load geometry from {outputFormat} files")
 
-		return RenderSCADCode_raw(code, "out" + outputFormat)
-
-	raw_data, cached_is3d = rawCache.lookup(code)
-
-	if raw_data is None:
+		profiling.count("renders")
+		profiling.count("cache misses")
+		raw_data = RenderSCADCode_raw(code, "out" + outputFormat, useCache, timeout,
+		                              memoryLimit, job, backend)
+		profiling.count("output bytes", len(raw_data))
+		_profileRender(code, "", "openscad", raw_data)
+		return raw_data
+
+	if not decode or not geometryCache:
+		geometryCache = None
+	elif not isinstance(geometryCache, GeometryCache):
+		geometryCache = DefaultGeometryCache
+
+	namespace = GetRenderNamespace(useCache, backend, binarySTL)
+	profiling.count("renders")
+
+	if geometryCache is not None:
+		res = geometryCache.lookup((codeDigest(code, namespace), bool(is3d)))
+		if res is not None:
+			profiling.count("cache hits")
+			_profileRender(code, namespace, "geometry cache", res[0])
+			return res
+
+	knownTimeout = rawCache.lookupTimeout(code, namespace)
+	if knownTimeout is not None and timeout is not None and timeout <= knownTimeout:
+		raise RenderTimeoutError(
+		  timeout, f"OpenSCAD render previously exceeded {knownTimeout}s")
+
+	raw_data, cached_is3d = rawCache.lookup(code, namespace)
+	mesh = None
+
+	if raw_data is not None:
+		profiling.count("cache hits")
+		_profileRender(code, namespace, "render cache", raw_data)
+		if decode and is3d and raw_data:
+			mesh = rawCache.lookupMesh(code, namespace)
+	else:
 		if cacheOnly:
 			if decode:
 				return None, None
@@ -190,27 +791,54 @@ def RenderSCADCode(code,
 		t0 = time.time()
 		try:
 			try:
-				raw_data = RenderSCADCode_raw(code, fb)
+				raw_data = RenderSCADCode_raw(code, fb, useCache, timeout, memoryLimit,
+				                              job, backend, binarySTL)
 			finally:
 				renderTime = time.time() - t0
-		except RuntimeError:
-			if not isinstance(rawCache, DisabledSCADCache):
-				rawCache.store(code, None, None, renderTime)
+		except RenderCancelledError:
+			raise
+		except RuntimeError as e:
+			failedTimeout = e.timeout if isinstance(e, RenderTimeoutError) else None
+			# a failure under a memory limit may be caused by the limit, so it is
+			# not recorded as a failure of the code
+			limited = memoryLimit is not None and failedTimeout is None
+			if not isinstance(rawCache, DisabledSCADCache) and not limited:
+				rawCache.store(code, None, None, renderTime, namespace, failedTimeout)
 				if referenceCode is not None:
-					rawCache.store(referenceCode, None, None, renderTime)
+					rawCache.store(referenceCode, None, None, renderTime, namespace,
+					               failedTimeout)
 			raise
 
+		profiling.count("cache misses")
+		profiling.count("output bytes", len(raw_data))
+		_profileRender(code, namespace, "openscad", raw_data, renderTime)
+
 		if not isinstance(rawCache, DisabledSCADCache):
-			rawCache.store(code, raw_data, is3d, renderTime)
+			rawCache.store(code, raw_data, is3d, renderTime, namespace)
 			if referenceCode is not None:
-				rawCache.store(referenceCode, raw_data, is3d, renderTime)
+				rawCache.store(referenceCode, raw_data, is3d, renderTime, namespace)
 
 	if decode:
-		soup = FaceSoup()
-		if is3d:
-			soup.load_stl(raw_data.decode())
-		else:
-			soup.load_svg_loops(raw_data.decode())
+		with profiling.phase("decode"):
+			if mesh is not None:
+				soup = IndexedMesh(*mesh)
+			elif is3d:
+				try:
+					soup = IndexedMesh()
+					soup.load_stl(raw_data)
+				except ValueError: # non-triangular facets
+					soup = FaceSoup()
+					soup.load_stl(raw_data)
+			else:
+				soup = FaceSoup()
+				soup.load_svg_loops(raw_data.decode())
+
+		if geometryCache is not None:
+			geometryCache.store((codeDigest(code, namespace), bool(is3d)), raw_data,
+			                    soup)
+			if referenceCode is not None:
+				geometryCache.store((codeDigest(referenceCode, namespace), bool(is3d)),
+				                    raw_data, soup)
 		return raw_data, soup
 
 	return raw_data
\ No newline at end of file
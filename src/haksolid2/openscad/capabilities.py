@@ -0,0 +1,78 @@
+import subprocess
+import threading
+import re
+from collections import namedtuple
+
+capabilities_t = namedtuple(
+  "capabilities_t",
+  "available version versionTuple cache exportFormats backends")
+
+Capabilities = None
+_capabilitiesLock = threading.Lock()
+
+
+def parseVersion(version):
+	"""Turns an OpenSCAD version string such as 2021.01 or 2024.12.06 into a
+	tuple of integers suitable for comparisons."""
+	return tuple(int(v) for v in re.findall("[0-9]+", version))
+
+
+def ProbeCapabilities(binary="openscad"):
+	"""Runs an OpenSCAD binary to find out its version, whether it supports the
+	--cache option, which export formats it knows and which geometry backends it
+	offers."""
+	try:
+		p_version = subprocess.run([binary, "--version"],
+		                           stdout=subprocess.PIPE,
+		                           stderr=subprocess.PIPE)
+		p_help = subprocess.run([binary, "--help"],
+		                        stdout=subprocess.PIPE,
+		                        stderr=subprocess.PIPE)
+	except OSError:
+		return capabilities_t(False, "unknown", (), False, frozenset(), ())
+
+	m = re.search(r"version\s+(\S+)",
+	              (p_version.stdout + p_version.stderr).decode())
+	version = m.group(1) if m else "unknown"
+
+	helptext = (p_help.stdout + p_help.stderr).decode()
+
+	cache = re.search(r"--cache[ \t]+arg", helptext) is not None
+
+	exportFormats = set()
+	m = re.search(r"the file extension specifies\s+the\s+type:\s*([a-z0-9,\s]+)",
+	              helptext)
+	if m:
+		exportFormats.update(v for v in re.split(r"[,\s]+", m.group(1)) if v)
+	if re.search(r"--export-format[ \t]+arg", helptext):
+		exportFormats.update(re.findall(r"'(asciistl|binstl)'", helptext))
+
+	backends = ()
+	m = re.search(r"--backend[ \t]+arg(.*?)(?:\n\s*-|\Z)", helptext, re.DOTALL)
+	if m:
+		backends = tuple(re.findall(r"'([A-Za-z0-9]+)'", m.group(1)))
+
+	return capabilities_t(True, version, parseVersion(version), cache,
+	                      frozenset(exportFormats), backends)
+
+
+def GetCapabilities():
+	"""Returns the capabilities of the installed OpenSCAD binary. The binary is
+	only probed on the first call of each process."""
+	global Capabilities
+	with _capabilitiesLock:
+		if Capabilities is None:
+			Capabilities = ProbeCapabilities()
+	return Capabilities
+
+
+def ResolveBackend(backend):
+	"""Returns the canonical spelling of a geometry backend offered by the
+	installed OpenSCAD binary, raising a ValueError if it is not available.
+	None selects OpenSCAD's default backend and is returned unchanged."""
+	if backend is None: return None
+	for name in GetCapabilities().backends:
+		if name.lower() == backend.lower():
+			return name
+	raise ValueError(
+	  f"OpenSCAD {GetCapabilities().version} does not offer the {backend} backend")
@@ -5,6 +5,7 @@ import warnings
 import numbers
 import numpy
 import math
+import sys
 from collections import namedtuple
 from collections.abc import Iterable
 from .cache import RenderSCADCode
@@ -14,43 +15,62 @@ variable_record_t = namedtuple(
   "variable_record_t", "ident group description domain symbol default isBool")
 
 
-class OpenSCADSympyPrinter(sympy.printing.StrPrinter):
+def _makeSympyPrinter():
+	# sympy is imported lazily, so the printer class is only defined once the
+	# first symbolic expression is emitted
+	class OpenSCADSympyPrinter(sympy.printing.StrPrinter):
 
-	FunctionMap = {
-	  'acos': '_rad_acos',
-	  'asin': '_rad_asin',
-	  'atan': '_rad_atan',
-	  'ceiling': 'ceil',
-	  'cos': '_rad_cos',
-	  'floor': 'floor',
-	  'log': 'log',
-	  'ln': 'ln',
-	  'log10': 'log',
-	  'sin': '_rad_sin',
-	  'Sqrt': 'sqrt',
-	  'tan': '_rad_tan',
-	}
+		FunctionMap = {
+		  'acos': '_rad_acos',
+		  'asin': '_rad_asin',
+		  'atan': '_rad_atan',
+		  'ceiling': 'ceil',
+		  'cos': '_rad_cos',
+		  'floor': 'floor',
+		  'log': 'log',
+		  'ln': 'ln',
+		  'log10': 'log',
+		  'sin': '_rad_sin',
+		  'Sqrt': 'sqrt',
+		  'tan': '_rad_tan',
+		}
 
-	def __init__(s, settings={}):
-		sympy.printing.StrPrinter.__init__(s, settings)
+		def __init__(s, settings={}):
+			sympy.printing.StrPrinter.__init__(s, settings)
 
-	def _print_Pi(s, expr):
-		return "PI"
+		def _print_Pi(s, expr):
+			return "PI"
 
-	def _print_Function(s, expr):
+		def _print_Function(s, expr):
 
-		ident = expr.func.__name__
-		if ident in s.FunctionMap:
-			ident = s.FunctionMap[ident]
+			ident = expr.func.__name__
+			if ident in s.FunctionMap:
+				ident = s.FunctionMap[ident]
 
-		return "%s(%s)" % (ident, ", ".join(s._print(arg) for arg in expr.args))
+			return "%s(%s)" % (ident, ", ".join(s._print(arg) for arg in expr.args))
 
-	def _print_Pow(s, expr, rational=False):
+		def _print_Pow(s, expr, rational=False):
 
-		return "pow(%s,%s)" % (s._print(expr.base), s._print(expr.exp))
+			return "pow(%s,%s)" % (s._print(expr.base), s._print(expr.exp))
 
+	return OpenSCADSympyPrinter()
 
-sympyPrinter = OpenSCADSympyPrinter()
+
+sympyPrinter = None
+
+
+def presetOverrides(variables, values):
+	"""Returns OpenSCAD assignments overriding customizer variables (the
+	variable_list of OpenSCADcodeGen) with the values of a preset, to be
+	appended to the code: the last assignment of a variable takes effect, which
+	is how openscad -D works, too. Values are converted to the type of a
+	variable's default like variable.default does, values of undeclared
+	variables are ignored."""
+	code = ""
+	for v in variables:
+		if v.ident in values:
+			code += f"{v.ident} = {scad_repr(type(v.default)(values[v.ident]))};\n"
+	return code
 
 
 def scad_repr(data):
@@ -67,7 +87,13 @@ def scad_repr(data):
 		if math.isnan(data): return "(0/0)"
 		elif math.isinf(data): return "(1e200*1e200)"
 		else: return repr(data)
-	elif isinstance(data, (sympy.core.Expr, sympy.core.relational.Relational)):
+	elif hasattr(data, "_sympy_"): # e.g. math.pi before sympy is imported
+		return scad_repr(data._sympy_())
+	elif "sympy" in sys.modules and isinstance(
+	  data, (sympy.core.Expr, sympy.core.relational.Relational)):
+		global sympyPrinter
+		if sympyPrinter is None:
+			sympyPrinter = _makeSympyPrinter()
 		return sympyPrinter.doprint(data)
 	elif type(data) == str:
 		data_enc = "".join(v if v != '"' else '\\"' for v in data)
@@ -431,7 +457,9 @@ class OpenSCADcodeGen(usability.TransformVisitor):
 				                           referenceCode=code_nocache)
 
 			s.code += "{"
-			if is3d:
+			if is3d and isinstance(soup, IndexedMesh):
+				s.code += f"polyhedron(points={scad_repr(soup.vertices)},faces={scad_repr(soup.indices)});"
+			elif is3d:
 				vertices = list()
 				faces = list()
 				for face in soup.faces:
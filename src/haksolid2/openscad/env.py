@@ -11,7 +11,6 @@ from ..dag import DAGModule, DAGGroup, DAGAnchor
 from ..prefabs import *
 from ..paradigms import *
 from ..exporters import *
-import sympy
 
 part.SetDefaultProcess(OpenSCADBuild())
 arrangement.SetDefaultProcess(
@@ -0,0 +1,257 @@
+from .cache import SCADCache, DirectorySCADCache
+from concurrent.futures import Future, TimeoutError, wait
+import threading
+import hashlib
+import pathlib
+import json
+import atexit
+import queue
+import zlib
+import time
+import os
+
+
+class ContentStore:
+	"""Content-addressable blob storage shared between machines, e.g. a team
+	file share or a CI cache server. Blobs are addressed by render cache digest."""
+	def get(s, digest):
+		raise NotImplementedError()
+
+	def put(s, digest, data):
+		raise NotImplementedError()
+
+
+class DirectoryContentStore(ContentStore):
+	"""Stores blobs as files below a (possibly network-mounted) directory"""
+	def __init__(s, fn):
+		s._fn = pathlib.Path(fn)
+
+	def _path(s, digest):
+		return s._fn / digest[:2] / digest
+
+	def get(s, digest):
+		try:
+			with open(s._path(digest), "rb") as f:
+				return f.read()
+		except FileNotFoundError:
+			return None
+
+	def put(s, digest, data):
+		fn = s._path(digest)
+		os.makedirs(fn.parent, exist_ok=True)
+		fn_tmp = fn.with_name(f"{fn.name}.{os.getpid()}.tmp")
+		with open(fn_tmp, "wb") as f:
+			f.write(data)
+		os.replace(fn_tmp, fn)
+
+
+class HTTPContentStore(ContentStore):
+	"""Stores blobs on an HTTP server answering GET and PUT requests on
+	<url>/<digest>, such as the one created by ServeContentStore."""
+	def __init__(s, url, timeout=10):
+		s.url = url.rstrip("/")
+		s.timeout = timeout
+
+	def get(s, digest):
+		import urllib.request
+		import urllib.error
+		try:
+			with urllib.request.urlopen(f"{s.url}/{digest}",
+			                            timeout=s.timeout) as f:
+				return f.read()
+		except urllib.error.HTTPError as e:
+			if e.code == 404: return None
+			raise
+
+	def put(s, digest, data):
+		import urllib.request
+		req = urllib.request.Request(f"{s.url}/{digest}", data=data, method="PUT")
+		with urllib.request.urlopen(req, timeout=s.timeout):
+			pass
+
+
+def ServeContentStore(store: ContentStore, address=("", 8000)):
+	"""Returns an HTTP server exposing a content store to HTTPContentStore
+	clients. Call serve_forever on the result to run it."""
+	import http.server
+
+	class Handler(http.server.BaseHTTPRequestHandler):
+		def _digest(s):
+			digest = s.path.strip("/")
+			if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+				s.send_error(400)
+				return None
+			return digest
+
+		def do_GET(s):
+			digest = s._digest()
+			if digest is None: return
+			data = store.get(digest)
+			if data is None:
+				s.send_error(404)
+				return
+			s.send_response(200)
+			s.send_header("Content-Length", str(len(data)))
+			s.end_headers()
+			s.wfile.write(data)
+
+		def do_PUT(s):
+			digest = s._digest()
+			if digest is None: return
+			store.put(digest, s.rfile.read(int(s.headers["Content-Length"])))
+			s.send_response(204)
+			s.end_headers()
+
+		def log_message(s, format, *args):
+			pass
+
+	return http.server.ThreadingHTTPServer(address, Handler)
+
+
+def packBlob(digest, result, is3d, renderTime, namespace):
+	header = {
+	  "digest": digest,
+	  "sha256": hashlib.sha256(result).hexdigest(),
+	  "is3d": bool(is3d),
+	  "renderTime": renderTime,
+	  "namespace": namespace,
+	}
+	return json.dumps(header).encode() + b"\n" + zlib.compress(result)
+
+
+def unpackBlob(digest, blob):
+	"""Returns the header and payload of a blob, raising a ValueError if it is
+	not the result stored for the given digest or its payload is corrupt."""
+	i_split = blob.index(b"\n")
+	header = json.loads(blob[:i_split])
+	if header["digest"] != digest:
+		raise ValueError(f"blob for {header['digest']} stored as {digest}")
+	result = zlib.decompress(blob[i_split + 1:])
+	if hashlib.sha256(result).hexdigest() != header["sha256"]:
+		raise ValueError(f"corrupt payload in blob {digest}")
+	return header, result
+
+
+class _DaemonExecutor:
+	"""Runs calls on a fixed number of daemon threads, so that calls stuck on an
+	unreachable store neither pile up threads nor keep the process from exiting"""
+	def __init__(s, workers):
+		s._workers = workers
+		s._queue = queue.SimpleQueue()
+		s._threads = list()
+		s._lock = threading.Lock()
+
+	def submit(s, fn, *args):
+		future = Future()
+		s._queue.put((future, fn, args))
+		with s._lock:
+			if len(s._threads) < s._workers:
+				thread = threading.Thread(target=s._work, daemon=True)
+				thread.start()
+				s._threads.append(thread)
+		return future
+
+	def _work(s):
+		while True:
+			future, fn, args = s._queue.get()
+			if not future.set_running_or_notify_cancel(): continue
+			try:
+				future.set_result(fn(*args))
+			except BaseException as e:
+				future.set_exception(e)
+
+
+class SharedSCADCache(SCADCache):
+	"""Layers a local DirectorySCADCache over a shared ContentStore. Local misses
+	read through to the store, successful renders are written through to it in
+	the background. Store accesses give up after the given timeout, so a slow or
+	unreachable remote turns into a cache miss instead of blocking the build.
+	After maxFailures consecutive timeouts or errors the store is skipped for
+	backoff seconds. Pending write-throughs are flushed at exit."""
+	def __init__(s,
+	             local: DirectorySCADCache,
+	             store: ContentStore,
+	             timeout=2,
+	             writeThrough=True,
+	             maxFailures=3,
+	             backoff=60):
+		s.local = local
+		s.shared = store
+		s.timeout = timeout
+		s.writeThrough = writeThrough
+		s.maxFailures = maxFailures
+		s.backoff = backoff
+		s.remoteHits = 0
+		s.remoteErrors = 0
+		s.remoteSkips = 0
+		s._failures = 0
+		s._skipUntil = 0
+		s._executor = _DaemonExecutor(4)
+		s._pending = set()
+		atexit.register(s.flush, timeout)
+
+	def _available(s):
+		if time.monotonic() < s._skipUntil:
+			s.remoteSkips += 1
+			return False
+		return True
+
+	def _failed(s):
+		s.remoteErrors += 1
+		s._failures += 1
+		if s._failures >= s.maxFailures:
+			s._failures = 0
+			s._skipUntil = time.monotonic() + s.backoff
+
+	def lookup(s, code, namespace=""):
+		raw, is3d = s.local.lookup(code, namespace)
+		if raw is not None:
+			return raw, is3d
+		if not s._available(): return None, None
+
+		digest = s.local.digest(code, namespace)
+		try:
+			blob = s._executor.submit(s.shared.get, digest).result(s.timeout)
+		except (OSError, TimeoutError):
+			s._failed()
+			return None, None
+		s._failures = 0
+		if blob is None: return None, None
+		try:
+			header, raw = unpackBlob(digest, blob)
+		except (ValueError, KeyError, zlib.error):
+			s.remoteErrors += 1
+			return None, None
+
+		s.remoteHits += 1
+		s.local.store(code, raw, header["is3d"], header["renderTime"], namespace)
+		return raw, header["is3d"]
+
+	def lookupMesh(s, code, namespace=""):
+		return s.local.lookupMesh(code, namespace)
+
+	def lookupTimeout(s, code, namespace=""):
+		return s.local.lookupTimeout(code, namespace)
+
+	def store(s, code, result, is3d, renderTime, namespace="", timeout=None):
+		s.local.store(code, result, is3d, renderTime, namespace, timeout)
+		if result is None or not s.writeThrough: return
+		if not s._available(): return
+
+		digest = s.local.digest(code, namespace)
+		future = s._executor.submit(
+		  s._put, digest, packBlob(digest, result, is3d, renderTime, namespace))
+		s._pending.add(future)
+		future.add_done_callback(s._pending.discard)
+
+	def _put(s, digest, blob):
+		try:
+			s.shared.put(digest, blob)
+		except OSError:
+			s._failed()
+			return
+		s._failures = 0
+
+	def flush(s, timeout=None):
+		"""Waits for pending write-throughs to finish"""
+		wait(list(s._pending), timeout)
@@ -0,0 +1,121 @@
+from .cache import RenderSCADCode, RenderJob
+from ..processing import profiling
+from concurrent.futures import ThreadPoolExecutor, Future, InvalidStateError
+import threading
+import os
+
+
+def _copyResult(res):
+	if isinstance(res, tuple):
+		raw, soup = res
+		return raw, soup.copy() if soup is not None else None
+	return res
+
+
+class _SharedRender:
+	def __init__(s, future, job):
+		s.future = future
+		s.job = job
+		s.clients = set()
+
+
+class RenderFuture(Future):
+	"""Future of a scheduled render. Cancelling it kills the underlying OpenSCAD
+	process once no other caller is waiting for the same render."""
+	def __init__(s, scheduler, key):
+		Future.__init__(s)
+		s._scheduler = scheduler
+		s._key = key
+
+	def cancel(s):
+		if not Future.cancel(s): return False
+		s._scheduler._release(s._key, s)
+		return True
+
+
+class RenderScheduler:
+	"""Runs RenderSCADCode jobs on a bounded pool of worker threads, each of which
+	waits on one OpenSCAD process at a time. Identical jobs submitted while one is
+	in flight share its render, each caller receiving its own copy of decoded
+	geometry."""
+
+	DefaultMaxWorkers = None
+
+	def __init__(s, maxWorkers=None):
+		if maxWorkers is None:
+			maxWorkers = s.DefaultMaxWorkers or os.cpu_count() or 1
+		s.maxWorkers = maxWorkers
+		s._executor = ThreadPoolExecutor(max_workers=maxWorkers)
+		s._inflight = dict()
+		s._lock = threading.Lock()
+
+	def submit(s, code, is3d, **kwargs):
+		"""Schedules RenderSCADCode(code, is3d, **kwargs) and returns a future of
+		its result."""
+		key = (code, bool(is3d), tuple(sorted(kwargs.items(), key=lambda v: v[0])))
+		res = RenderFuture(s, key)
+		with s._lock:
+			shared = s._inflight.get(key)
+			if shared is None:
+				job = RenderJob()
+				shared = _SharedRender(
+				  s._executor.submit(profiling.bind(RenderSCADCode),
+				                     code,
+				                     is3d,
+				                     job=job,
+				                     **kwargs), job)
+				s._inflight[key] = shared
+				shared.future.add_done_callback(lambda f: s._forget(key, f))
+			shared.clients.add(res)
+
+		def done(f):
+			try:
+				if f.cancelled():
+					res.cancel()
+				elif f.exception() is not None:
+					res.set_exception(f.exception())
+				else:
+					res.set_result(_copyResult(f.result()))
+			except InvalidStateError: # cancelled by the caller meanwhile
+				pass
+
+		shared.future.add_done_callback(done)
+		return res
+
+	def _release(s, key, client):
+		with s._lock:
+			shared = s._inflight.get(key)
+			if shared is None: return
+			shared.clients.discard(client)
+			if shared.clients: return
+			del s._inflight[key]
+		shared.future.cancel()
+		shared.job.cancel()
+
+	def _forget(s, key, future):
+		with s._lock:
+			shared = s._inflight.get(key)
+			if shared is not None and shared.future is future:
+				del s._inflight[key]
+
+	def cancelAll(s):
+		"""Cancels every pending and running render"""
+		with s._lock:
+			clients = [c for shared in s._inflight.values() for c in shared.clients]
+		for client in clients:
+			client.cancel()
+
+	def shutdown(s, wait=True):
+		s._executor.shutdown(wait)
+
+
+DefaultScheduler = None
+_defaultSchedulerLock = threading.Lock()
+
+
+def GetDefaultScheduler():
+	global DefaultScheduler
+	with _defaultSchedulerLock:
+		if DefaultScheduler is None:
+			DefaultScheduler = RenderScheduler()
+	return DefaultScheduler
@@ -1,4 +1,15 @@
-from . import lasercut
-from . import platinum
-from . import netfold
-from . import layeredcase
+import importlib
+
+# paradigms are independent of each other and some need optional dependencies
+# (netfold uses slvs), so each is imported on first access (PEP 562)
+__all__ = ["lasercut", "platinum", "netfold", "layeredcase"]
+
+
+def __getattr__(name):
+	if name in __all__:
+		return importlib.import_module(f".{name}", __name__)
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__))
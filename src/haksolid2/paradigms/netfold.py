@@ -5,7 +5,6 @@ from .. import transform
 from .. import metadata
 from collections import namedtuple, defaultdict
 import math
-import slvs
 
 edge_t = namedtuple("edge_t", "angle length")
 attachment_t = namedtuple("attachment_t", "partner partnerEdge dihedral")
@@ -68,6 +67,7 @@ class Vertex:
 				else:
 					polygonVertexIndices.append((ivertex - 1, ivertex, ivertex + 1))
 
+		import slvs
 		sss = slvs.System()
 
 		points = list()
@@ -449,6 +449,7 @@ class Polygon:
 					v.instance.references.append(v)
 
 			if True: # re-solve geometry
+				import slvs
 				sss = slvs.System()
 				idPoints = dict()
 				for k, v in idVertices.items():
@@ -1,2 +1,5 @@
 from .entities import EntityDefinitionWarning, EntityRecord, EntityType, part, arrangement, EntityNode, registerEntity, buildEntity
-from .processes import ProcessBase, ProcessResults, ProcessResultViewer, SubprocessResultViewer
\ No newline at end of file
+from .processes import ProcessBase, ProcessResults, ProcessResultViewer, SubprocessResultViewer
+from .manifest import BuildManifest, GetManifest, buildDigest
+from .dependencies import dependency_record_t, getDependencies, affectedEntities
+from .profiling import BuildProfile, GetDefaultProfile
\ No newline at end of file
@@ -1,13 +1,19 @@
 import cli
-from . import entities, customizer
+from . import entities, customizer, manifest, reload, dependencies, profiling
+from .. import openscad, metadata
 import re
 import sys
-import pyinotify
 import os
 import warnings
 import queue
 import threading
 import subprocess
+import time
+import io
+import contextlib
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 
 class entname_t:
@@ -20,6 +26,19 @@ class entname_t:
 			raise TypeError(f"not a valid filter: {v} ({e})")
 
 
+class budget_t:
+	"""Byte count with an optional K, M or G suffix"""
+	e_budget = re.compile(r"([0-9]+(?:\.[0-9]*)?)([kKmMgG]?)[bB]?")
+
+	def __init__(s, v):
+		s.code = v
+		m = budget_t.e_budget.fullmatch(v.strip())
+		if m is None:
+			raise TypeError(f"not a valid size: {v}")
+		exponent = "kmg".index(m.group(2).lower()) + 1 if m.group(2) else 0
+		s.value = int(float(m.group(1)) * 1024**exponent)
+
+
 vBuildCustomizer = cli.Variable(
   str, None, "C", "build-customizer",
   "Name of a customizer file from which multiple variants are built")
@@ -34,10 +53,42 @@ vBuildArrangement = cli.Variable(entname_t, None, "a", "arrange",
 fViewArrangement = cli.Flag(
   "v", "view-arrangement",
   "run the arrangement (selected with -a) into a suitable viewer program")
+vCollectCache = cli.Variable(
+  budget_t, None, "G", "gc",
+  "apply the eviction policy to the render cache until it fits into the given size (e.g. 500M)"
+)
+fBenchmarkBackends = cli.Flag(
+  "K", "benchmark-backends",
+  "instead of building the selected parts, render them under every available OpenSCAD geometry backend and report timings and result equivalence"
+)
+vJobs = cli.Variable(
+  int, 1, "j", "jobs",
+  "number of worker processes building parts in parallel (they share the render cache)"
+)
+fForce = cli.Flag(
+  "f", "force",
+  "rebuild the selected parts even if the build manifest shows their outputs are up to date"
+)
+fBatchPresets = cli.Flag(
+  "P", "batch-presets",
+  "with -C, generate the code of parts built with OpenSCAD once and render all presets from it concurrently, overriding the customizer variables (parts must not read variable defaults in Python)"
+)
+fProfile = cli.Flag(
+  "T", "profile",
+  "print the time each build phase took per entity, along with render cache hits and misses and the bytes generated"
+)
+vProfileJSON = cli.Variable(
+  str, None, "J", "profile-json",
+  "write the build profile (see -T) as JSON to the given file, e.g. for tracking trends in CI"
+)
 fWatch = cli.Flag(
   "w", "watch",
   "keep running in the background and re-execute when files changed")
 
+# seconds without further change events before watch mode rebuilds, so that an
+# editor writing several files (or one file in several steps) causes one rebuild
+WatchDebounce = 0.3
+
 partsToBuild = set()
 presetsToBuild = set()
 arrangementToBuild = None
@@ -81,6 +132,19 @@ def help_list_parts(f):
 				f.write(f"  {k}\n")
 
 
+def selectParts():
+	"""Returns the registered parts selected with -B or -b"""
+	partsToBuildDict = dict()
+	if fBuildAll:
+		for part in filterEntities(lambda t: t is entities.part):
+			partsToBuildDict[part.name] = part
+	else:
+		for part in filterEntities(lambda t: t is entities.part,
+		                           lBuildFilters.values):
+			partsToBuildDict[part.name] = part
+	return list(partsToBuildDict.values())
+
+
 @cli.check
 def check_inputs():
 	global partsToBuild, arrangementToBuild, presetsToBuild
@@ -100,16 +164,7 @@ def check_inputs():
 			if fViewArrangement.value:
 				raise cli.clex("-v is useless without -a")
 
-	if True: # generate list of parts to build
-		partsToBuildDict = dict()
-		if fBuildAll:
-			for part in filterEntities(lambda t: t is entities.part):
-				partsToBuildDict[part.name] = part
-		else:
-			for part in filterEntities(lambda t: t is entities.part,
-			                           lBuildFilters.values):
-				partsToBuildDict[part.name] = part
-		partsToBuild = list(partsToBuildDict.values())
+	partsToBuild = selectParts()
 
 	if True: # load customizer presets to build
 		if vBuildCustomizer.value is not None:
@@ -119,31 +174,273 @@ def check_inputs():
 		else:
 			presetsToBuild.add((None, None))
 
-	if len(partsToBuild) < 1 and arrangementToBuild is None:
+	if vJobs.value < 1:
+		raise cli.clex("-j needs at least one worker")
+
+	if (len(partsToBuild) < 1 and arrangementToBuild is None and
+	    vCollectCache.value is None):
 		raise cli.clex("nothing to do")
 
 
+def _initWorker(defaults, force, profile, renderWorkers):
+	"""Initialises a build worker spawned by buildParallel with the state climain
+	set up from the command line, and its share of the render threads. Its entity
+	registry was rebuilt when multiprocessing imported the main script into the
+	worker."""
+	for k, v in defaults.items():
+		metadata.variable.SetGlobalDefault(k, v)
+	manifest.Force = force
+	profiling.Profiling = profile
+	openscad.RenderScheduler.DefaultMaxWorkers = renderWorkers
+
+
+def _buildPart(name, presetFile, presetName):
+	"""Builds a part in a worker process spawned by buildParallel, constructing
+	its DAG from the entity record registered by the main script. Returns the
+	build's console output, a formatted error, if any, whether the build was
+	skipped as up to date, and its profile."""
+	out = io.StringIO()
+	error = None
+	skipped = False
+	profiling.GetDefaultProfile().clear()
+	with contextlib.redirect_stdout(out):
+		try:
+			part = entities.getEntities()[name]
+			if presetFile is not None:
+				presetFile.applyPreset(presetName)
+			if presetName is not None:
+				part = part.namedCopy(f"{part.name}-{presetName}")
+			skipped = getattr(entities.buildEntity(part), "skipped", False)
+		except Exception:
+			error = traceback.format_exc()
+	return out.getvalue(), error, skipped, profiling.GetDefaultProfile().toJSON()
+
+
+def buildParallel(jobs, workers):
+	"""Builds (part, presetFile, presetName) jobs in a pool of worker processes.
+	Progress is reported in job order, errors are collected and summarised at the
+	end. Returns the number of failed and skipped builds.
+
+	Workers are spawned rather than forked, as this process may hold running
+	render threads and locks by now. They import the main script to register its
+	entities, so it has to be a file, and calling climain from it is a no-op in
+	workers. The render threads of this process are split between the workers,
+	so that at most as many OpenSCAD processes run at once as without them."""
+	failed = list()
+	skippedCount = 0
+	renderWorkers = (openscad.RenderScheduler.DefaultMaxWorkers or
+	                 os.cpu_count() or 1) // workers
+	with ProcessPoolExecutor(
+	  max_workers=workers,
+	  mp_context=multiprocessing.get_context("spawn"),
+	  initializer=_initWorker,
+	  initargs=(metadata.variable.GetGlobalDefaults(), manifest.Force,
+	            profiling.Profiling, max(1, renderWorkers))) as executor:
+		futures = [
+		  executor.submit(_buildPart, part.name, presetFile, presetName)
+		  for part, presetFile, presetName in jobs
+		]
+		for i, ((part, presetFile, presetName),
+		        future) in enumerate(zip(jobs, futures)):
+			name = part.name if presetName is None else f"{part.name}-{presetName}"
+			try:
+				out, error, skipped, profile = future.result()
+			except Exception as e: # worker died
+				out, error, skipped, profile = ("", f"{type(e).__name__}: {e}\n",
+				                                False, {})
+			sys.stdout.write(out)
+			profiling.GetDefaultProfile().merge(profile)
+			if error is not None:
+				status = "failed"
+				failed.append((name, error))
+			elif skipped:
+				status = "up to date"
+				skippedCount += 1
+			else:
+				status = "done"
+			print(f"[{i+1}/{len(jobs)}] {name}: {status}")
+
+	if len(failed) > 0:
+		print(f"{len(failed)} of {len(jobs)} builds failed:")
+		for name, error in failed:
+			print(f"--- {name}")
+			sys.stdout.write(error)
+	return len(failed), skippedCount
+
+
+def buildPresetBatch(parts):
+	"""Builds parts for all selected customizer presets with
+	OpenSCADBuild.submitPresets, generating the code of each part once. Returns
+	the number of failed and skipped builds."""
+	presets = {
+	  presetName: presetFile.presets[presetName]
+	  for presetFile, presetName in sorted(presetsToBuild, key=lambda v: v[1])
+	}
+	futures = list()
+	failed = list()
+	for part in parts:
+		try:
+			submitted = part.process.submitPresets(part, presets)
+		except Exception:
+			error = traceback.format_exc()
+			failed += [(f"{part.name}-{presetName}", error) for presetName in presets]
+			continue
+		for presetName, future in submitted.items():
+			futures.append((f"{part.name}-{presetName}", future))
+
+	skippedCount = 0
+	for name, future in futures:
+		try:
+			if future.result().skipped:
+				skippedCount += 1
+		except Exception:
+			failed.append((name, traceback.format_exc()))
+
+	if len(failed) > 0:
+		print(f"{len(failed)} of {len(parts) * len(presets)} builds failed:")
+		for name, error in failed:
+			print(f"--- {name}")
+			sys.stdout.write(error)
+	return len(failed), skippedCount
+
+
+def buildParts(parts):
+	"""Builds parts for each selected customizer preset, in parallel if requested
+	with -j, and prints a summary. Returns the number of failed builds."""
+	failedCount = 0
+	skippedCount = 0
+	buildCount = len(parts) * len(presetsToBuild)
+	if fBatchPresets.value and vBuildCustomizer.value is not None:
+		batch = [
+		  part for part in parts
+		  if isinstance(part.process, openscad.OpenSCADBuild)
+		]
+		parts = [part for part in parts if part not in batch]
+		failedCount, skippedCount = buildPresetBatch(batch)
+
+	if vJobs.value > 1 and len(parts) > 0:
+		jobs = [(part, presetFile, presetName)
+		        for presetFile, presetName in presetsToBuild
+		        for part in parts]
+		failed, skipped = buildParallel(jobs, vJobs.value)
+		failedCount += failed
+		skippedCount += skipped
+	elif len(parts) > 0:
+		for presetFile, presetName in presetsToBuild:
+			if presetFile is not None:
+				presetFile.applyPreset(presetName)
+			for part in parts:
+				if presetName is not None:
+					part = part.namedCopy(f"{part.name}-{presetName}")
+				# not every process returns ProcessResults
+				if getattr(entities.buildEntity(part), "skipped", False):
+					skippedCount += 1
+
+	if buildCount > 0:
+		print(f"{buildCount - skippedCount - failedCount} parts rebuilt, " +
+		      f"{skippedCount} up to date")
+	return failedCount
+
+
+def reportProfile():
+	"""Prints or writes the profile of the builds so far, if requested, and
+	starts a new one"""
+	if not profiling.Profiling: return
+	profile = profiling.GetDefaultProfile()
+	if fProfile.value:
+		profile.report()
+	if vProfileJSON.value is not None:
+		profile.write(vProfileJSON.value)
+	profile.clear()
+
+
+def rebuildChanged(changedFiles, new_cmdline):
+	"""Reloads the user modules whose files changed and rebuilds the selected
+	parts and arrangement depending on a changed file, in process so that render
+	caches stay warm. Files imported by geometryImport nodes are watched too and
+	only cause the entities importing them to be rebuilt. Restarts the build in a
+	new process if haksolid2 itself changed."""
+	global partsToBuild, arrangementToBuild
+
+	sourceFiles = set(changedFiles) - dependencies.trackedFiles()
+	try:
+		if len(sourceFiles) > 0:
+			affected = reload.reloadModules(sourceFiles)
+		else:
+			affected = set()
+	except Exception:
+		traceback.print_exc()
+		return
+	if affected is None:
+		subprocess.run(new_cmdline)
+		return
+
+	ents = entities.getEntities()
+	rebuild = dependencies.affectedEntities(ents, changedFiles, affected)
+	dependencies.forgetDependencies(rebuild)
+
+	partsToBuild = selectParts()
+	if arrangementToBuild is not None and arrangementToBuild.name in ents:
+		arrangementToBuild = ents[arrangementToBuild.name]
+		if arrangementToBuild.name in rebuild:
+			entities.buildEntity(arrangementToBuild)
+
+	buildParts([part for part in partsToBuild if part.name in rebuild])
+	reportProfile()
+
+
 def climain():
+	if reload.Reloading: return # main script re-executed in watch mode
+	if multiprocessing.parent_process() is not None:
+		return # main script imported by a build worker, see buildParallel
+
 	cli.process()
 
+	# record what each entity depends on, to rebuild only affected ones on change
+	dependencies.TrackDependencies = fWatch.value
+	profiling.Profiling = fProfile.value or vProfileJSON.value is not None
+
 	global partsToBuild, arrangementToBuild, presetsToBuild
 
 	viewer = None
 
+	if vCollectCache.value is not None:
+		cache = openscad.cache.GetDefaultCache()
+		if isinstance(cache, openscad.SharedSCADCache):
+			cache = cache.local
+		if isinstance(cache, openscad.DirectorySCADCache):
+			evicted = cache.gc(maxBytes=vCollectCache.value.value)
+			print(f"evicted {len(evicted)} render cache entries")
+
 	if arrangementToBuild is not None:
 		res = entities.buildEntity(arrangementToBuild)
 		if fViewArrangement.value:
 			viewer = arrangementToBuild.process.watch(res)
 
-	for presetFile, presetName in presetsToBuild:
-		if presetFile is not None:
-			presetFile.applyPreset(presetName)
+	if fBenchmarkBackends.value:
 		for part in partsToBuild:
-			if presetName is not None:
-				part = part.namedCopy(f"{part.name}-{presetName}")
-			entities.buildEntity(part)
+			if not isinstance(part.process, openscad.OpenSCADBuild):
+				print(f"{part.name}: not built with OpenSCAD")
+				continue
+			print(f"{part.name}:")
+			for record in part.process.benchmarkBackends(part):
+				if record.error is not None:
+					print(f"  {record.backend}: failed ({record.error})")
+				else:
+					print(f"  {record.backend}: {record.wallTime:.3f}s" +
+					      ("" if record.equivalent else " (differing result)"))
+		partsToBuild = list()
+
+	if fForce.value:
+		manifest.Force = True
+
+	failedCount = buildParts(partsToBuild)
+	reportProfile()
+	if failedCount > 0 and not fWatch.value:
+		sys.exit(1)
 
 	if fWatch.value:
+		import pyinotify
 
 		# list files we need to watch for changes
 		watchlist = list()
@@ -161,6 +458,10 @@ def climain():
 			if not os.access(fn, os.W_OK): continue
 			watchlist.append(fn)
 			mgr.add_watch(fn, pyinotify.IN_MODIFY)
+		for fn in sorted(dependencies.trackedFiles()):
+			if fn not in watchlist and os.path.exists(fn):
+				watchlist.append(fn)
+				mgr.add_watch(fn, pyinotify.IN_MODIFY)
 
 		new_cmdline = [sys.executable] + [
 		  v for v in sys.argv
@@ -176,30 +477,48 @@ def climain():
 
 		class EventHandler(pyinotify.ProcessEvent):
 			def process_IN_MODIFY(s, ev):
-				evq.put(EV_MODIFY)
+				evq.put((EV_MODIFY, os.path.realpath(ev.pathname)))
 
 		def thrdf_viewer():
 
 			# todo: get file name from actual method call above
 			viewer.wait()
-			evq.put(EV_TERMINATE)
+			evq.put((EV_TERMINATE, None))
 
 		def thrdf_inotify():
 
 			handler = EventHandler()
 			notifier = pyinotify.Notifier(mgr, handler)
 			notifier.loop()
-			thrd_inotify = threading.Thread(target=notifier.loop)
-			thrd_inotify.start()
-			evq.put(EV_TERMINATE)
+			evq.put((EV_TERMINATE, None))
 
 		if viewer is not None:
 			threading.Thread(target=thrdf_viewer, daemon=True).start()
 		threading.Thread(target=thrdf_inotify, daemon=True).start()
 
-		# process events coming from threads above
+		# process events coming from threads above, collecting the files changed
+		# until no event arrived for WatchDebounce seconds
 		while True:
-			ev = evq.get()
+			ev, fn = evq.get()
 			if ev == EV_TERMINATE: break
-			elif ev == EV_MODIFY:
-				subprocess.run(new_cmdline)
+			changedFiles = {fn}
+			while ev != EV_TERMINATE:
+				try:
+					ev, fn = evq.get(timeout=WatchDebounce)
+				except queue.Empty:
+					break
+				if ev == EV_MODIFY:
+					changedFiles.add(fn)
+			if ev == EV_TERMINATE: break
+
+			t0 = time.time()
+			rebuildChanged(changedFiles, new_cmdline)
+			changes = ", ".join(sorted(os.path.basename(fn) for fn in changedFiles))
+			print(f"rebuilt after change to {changes} in {time.time() - t0:.1f}s")
+
+			# user modules imported by the reloaded code and files imported by the
+			# rebuilt entities
+			for fn in list(reload.userModules()) + sorted(dependencies.trackedFiles()):
+				if fn not in watchlist and os.path.exists(fn):
+					watchlist.append(fn)
+					mgr.add_watch(fn, pyinotify.IN_MODIFY)
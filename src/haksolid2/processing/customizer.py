@@ -2,7 +2,6 @@ import cli
 import json
 from collections import namedtuple
 import os
-import jsonschema
 from .. import metadata
 
 fn_schema = os.path.join(os.path.dirname(os.path.realpath(__file__)),
@@ -35,6 +34,7 @@ class PresetFile:
 	def __init__(s, fn):
 		with open(fn, "r") as f:
 			data = json.load(f)
+		import jsonschema
 		jsonschema.validate(data, getSchema())
 
 		s.presets = data["parameterSets"]
@@ -48,6 +48,7 @@ class PresetFile:
 @cli.check
 def check_customizer():
 	if len(customizerPresets) < 1: return
+	import jsonschema
 	parameterSets = dict()
 
 	for fn, preset in customizerPresets:
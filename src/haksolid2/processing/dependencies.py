@@ -0,0 +1,107 @@
+from collections import namedtuple
+import os
+import sys
+
+dependency_record_t = namedtuple("dependency_record_t",
+                                 "sources functions imports")
+dependency_record_t.__doc__ = """Dependencies of an entity: the user source
+files and the (module, qualified name) functions executed while its DAG was
+constructed, and the files it imports through primitives.geometryImport"""
+
+# set by climain in watch mode, as tracing slows down DAG construction
+TrackDependencies = False
+
+_records = dict()
+
+
+def traceCalls(construct):
+	"""Calls construct() while recording the code objects of all Python
+	functions it executes. Returns its result and the set of code objects."""
+	codes = set()
+
+	def profile(frame, event, arg):
+		if event == "call":
+			codes.add(frame.f_code)
+
+	previous = sys.getprofile()
+	sys.setprofile(profile)
+	try:
+		return construct(), codes
+	finally:
+		sys.setprofile(previous)
+
+
+def constructNode(ent):
+	"""Constructs the DAG of an entity record, recording its dependencies"""
+	from . import reload
+	from .. import metadata
+
+	node, codes = traceCalls(lambda: ent._subject(*ent._args, **ent._kwargs))
+
+	modules = reload.userModules()
+	paths = dict()
+	for fn in {code.co_filename for code in codes}:
+		paths[fn] = os.path.realpath(fn)
+
+	sources = set()
+	functions = set()
+	for code in codes:
+		fn = paths[code.co_filename]
+		if fn not in modules: continue
+		sources.add(fn)
+		functions.add((modules[fn], getattr(code, "co_qualname", code.co_name)))
+	for fn, name in modules.items():
+		if name == ent.module:
+			sources.add(fn)
+
+	visitor = metadata.ImportedFilesVisitor()
+	node.visitDescendants(visitor)
+
+	record = dependency_record_t(frozenset(sources), frozenset(functions),
+	                             frozenset(visitor.files))
+	previous = _records.get(ent.baseName)
+	if previous is not None and ent.name != ent.baseName:
+		# copies built for customizer presets share the base entity's record
+		record = dependency_record_t(*(a | b for a, b in zip(previous, record)))
+	_records[ent.baseName] = record
+
+	return node
+
+
+def getDependencies(name):
+	"""Returns the dependency_record_t of an entity built while dependencies
+	were tracked, or None"""
+	return _records.get(name)
+
+
+def forgetDependencies(names):
+	"""Drops the recorded dependencies of entities about to be rebuilt"""
+	for name in names:
+		_records.pop(name, None)
+
+
+def trackedFiles():
+	"""Returns all files imported by entities with recorded dependencies"""
+	res = set()
+	for record in _records.values():
+		res |= record.imports
+	return res
+
+
+def affectedEntities(ents, changedFiles, affectedModules=()):
+	"""Returns the names of the entities (given as a dict like getEntities
+	returns) that depend on one of the changed files or reloaded modules. An
+	entity is affected by the reloaded modules if the module defining it or one
+	whose functions it executed is among them, as it may read their globals."""
+	res = set()
+	for name, ent in ents.items():
+		if ent.module in affectedModules:
+			res.add(name)
+			continue
+		record = _records.get(name)
+		if record is None: continue
+		if not (record.sources | record.imports).isdisjoint(changedFiles):
+			res.add(name)
+		elif any(module in affectedModules for module, _ in record.functions):
+			res.add(name)
+	return res
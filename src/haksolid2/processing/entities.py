@@ -1,7 +1,9 @@
 from .. import dag
 from .. import errors
 from . import processes
+from . import profiling
 import warnings
+import sys
 
 _named_entities = dict()
 
@@ -37,6 +39,10 @@ class EntityRecord:
 			kwargs = dict()
 		s._args = args
 		s._kwargs = kwargs
+		# name of the user module registering the entity, see registerEntity
+		s.module = None
+		# name of the entity this record was copied from, see namedCopy
+		s.baseName = name
 
 	@property
 	def type(s):
@@ -57,12 +63,20 @@ class EntityRecord:
 	@property
 	def node(s):
 		if s._node is None:
-			s._node = s._subject(*s._args, **s._kwargs)
+			from . import dependencies
+			with profiling.phase("construct"):
+				if dependencies.TrackDependencies:
+					s._node = dependencies.constructNode(s)
+				else:
+					s._node = s._subject(*s._args, **s._kwargs)
 		return s._node
 
 	def namedCopy(s, name):
-		return EntityRecord(s._type, s._subject, name, s._description, s._process,
-		                    list(s._args), dict(s._kwargs))
+		res = EntityRecord(s._type, s._subject, name, s._description, s._process,
+		                   list(s._args), dict(s._kwargs))
+		res.module = s.module
+		res.baseName = s.baseName
+		return res
 
 
 class EntityDefinitionWarning(errors.HaksolidWarning):
@@ -78,7 +92,23 @@ def getEntities() -> dict:
 	return dict(_named_entities)
 
 
+def _callerModule():
+	"""Returns the name of the innermost module on the call stack that is not
+	part of haksolid2, i.e. the user module defining an entity"""
+	package = __name__.split(".")[0]
+	frame = sys._getframe(1)
+	while frame is not None:
+		name = frame.f_globals.get("__name__", "")
+		if name != package and not name.startswith(package + "."):
+			return name
+		frame = frame.f_back
+	return None
+
+
 def registerEntity(ent: EntityRecord):
+	if ent.module is None:
+		ent.module = _callerModule()
+
 	if ent.process is None:
 		warnings.warn(
 		  EntityDefinitionWarning(f"no process defined for entity {ent.name}"))
@@ -92,11 +122,27 @@ def registerEntity(ent: EntityRecord):
 		    f"entity {ent.name} redefined, ignored in entity list"))
 
 
+def unregisterModules(modules):
+	"""Removes the entities registered by the given modules, e.g. before they are
+	reloaded. Returns the names of the removed entities."""
+	global _named_entities
+	removed = [
+	  name for name, ent in _named_entities.items() if ent.module in modules
+	]
+	for name in removed:
+		del _named_entities[name]
+	return removed
+
+
 def buildEntity(ent: EntityRecord):
 	if ent.process is None:
 		raise EntityDefinitionError(f"process undefined for entity {ent.name}")
 
-	return ent.process(ent)
+	if not ent.name:
+		# helper records, e.g. of RenderModule, count to the entity being built
+		return ent.process(ent)
+	with profiling.entity(ent.name):
+		return ent.process(ent)
 
 
 class EntityType:
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+import time
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+# set by climain's --force to rebuild entities regardless of the manifest
+Force = False
+
+
+def buildDigest(code, parameters):
+	"""Returns the digest identifying a build: the generated code along with the
+	process parameters that determine its outputs (a JSON-serialisable dict)"""
+	header = json.dumps(parameters, sort_keys=True)
+	return hashlib.sha256((header + "\0" + code).encode()).hexdigest()
+
+
+def fileDigest(fn):
+	h = hashlib.sha256()
+	with open(fn, "rb") as f:
+		for block in iter(lambda: f.read(1 << 20), b""):
+			h.update(block)
+	return h.hexdigest()
+
+
+_fileDigests = dict()
+
+
+def cachedFileDigest(fn):
+	"""Like fileDigest, but only rehashes files whose size or modification time
+	changed since they were last hashed by this process"""
+	st = os.stat(fn)
+	key = (st.st_mtime_ns, st.st_size, st.st_ino)
+	cached = _fileDigests.get(fn)
+	if cached is not None and cached[0] == key:
+		return cached[1]
+	digest = fileDigest(fn)
+	_fileDigests[fn] = (key, digest)
+	return digest
+
+
+def _fileStat(fn):
+	st = os.stat(fn)
+	return [st.st_mtime_ns, st.st_size]
+
+
+class BuildManifest:
+	"""Records per entity the digest of its last build (see buildDigest), the
+	process parameters and the hashes, sizes and modification times of the files
+	it wrote, in a JSON file in the output directory. Processes consult it to
+	skip entities whose outputs are up to date, rehashing only files whose size
+	or modification time changed. Updates are locked, so parallel build workers
+	may share a manifest."""
+
+	Filename = ".haksolid2-manifest.json"
+
+	def __init__(s, directory):
+		s.directory = directory
+		s._fn = os.path.join(directory, s.Filename)
+		s._lock = threading.Lock()
+
+	def _read(s):
+		try:
+			with open(s._fn, "r") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return {"entities": {}}
+
+	def _write(s, manifest):
+		fn_tmp = f"{s._fn}.{os.getpid()}.{threading.get_ident()}"
+		with open(fn_tmp, "w") as f:
+			json.dump(manifest, f, indent=1, sort_keys=True)
+		os.replace(fn_tmp, s._fn)
+
+	def _update(s, update):
+		with s._lock, open(s._fn + ".lock", "a") as f_lock:
+			if fcntl is not None:
+				fcntl.flock(f_lock, fcntl.LOCK_EX)
+			manifest = s._read()
+			update(manifest["entities"])
+			s._write(manifest)
+
+	def entry(s, name):
+		return s._read()["entities"].get(name)
+
+	def upToDate(s, name, digest):
+		"""Returns the output files of the entity's last build if it had the same
+		digest and its outputs are unchanged, None otherwise"""
+		if Force: return None
+		entry = s.entry(name)
+		if entry is None or entry["digest"] != digest: return None
+
+		stats = entry.get("stats", {})
+		files = list()
+		for fb, sha256 in entry["files"].items():
+			fn = os.path.join(s.directory, fb)
+			if not os.path.isfile(fn):
+				return None
+			if stats.get(fb) != _fileStat(fn) and cachedFileDigest(fn) != sha256:
+				return None
+			files.append(fn)
+		return files
+
+	def record(s, name, digest, files, parameters=None):
+		"""Records a completed build and the files it wrote"""
+		entry = {
+		  "digest": digest,
+		  "parameters": parameters,
+		  "files": {
+		    os.path.relpath(fn, s.directory): cachedFileDigest(fn)
+		    for fn in files
+		  },
+		  "stats": {os.path.relpath(fn, s.directory): _fileStat(fn)
+		            for fn in files},
+		  "built": time.time(),
+		}
+
+		def update(entities):
+			entities[name] = entry
+
+		s._update(update)
+
+
+_manifests = dict()
+_manifestsLock = threading.Lock()
+
+
+def GetManifest(directory):
+	"""Returns the build manifest of an output directory"""
+	directory = os.path.realpath(directory)
+	with _manifestsLock:
+		if directory not in _manifests:
+			_manifests[directory] = BuildManifest(directory)
+		return _manifests[directory]
@@ -1,13 +1,15 @@
+from ..usability.shorthands import fn_main
 import os
 
-main = __import__("__main__")
-fn_main_dir = os.path.dirname(os.path.realpath(main.__file__))
+fn_main_dir = str(fn_main)
 
 
 class ProcessResults:
 	def __init__(s):
 		s.files = list()
 		s.data = dict()
+		# set when the build was skipped because its outputs were up to date
+		s.skipped = False
 
 
 class ProcessResultViewer:
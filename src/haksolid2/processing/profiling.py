@@ -0,0 +1,184 @@
+import contextlib
+import threading
+import json
+import time
+import sys
+
+# set by climain's --profile and --profile-json
+Profiling = False
+
+Phases = ("construct", "codegen", "dimensions", "openscad", "decode", "export")
+Counters = ("renders", "cache hits", "cache misses", "code bytes",
+            "output bytes")
+
+
+class BuildProfile:
+	"""Accumulates per entity the time spent in each build phase (see Phases),
+	counters (see Counters) and a record of every render. Phase times exclude
+	nested phases, e.g. DAG construction triggered by code generation. Renders
+	scheduled concurrently are timed in their worker threads, so the phase times
+	of an entity may add up to more than its wall time."""
+	def __init__(s):
+		s.entities = dict()
+		s._lock = threading.Lock()
+
+	def _entry(s, name):
+		entry = s.entities.get(name)
+		if entry is None:
+			entry = s.entities[name] = {
+			  "wall": 0.0,
+			  "phases": {},
+			  "counters": {},
+			  "renders": [],
+			}
+		return entry
+
+	def addWall(s, name, seconds):
+		with s._lock:
+			s._entry(name)["wall"] += seconds
+
+	def addPhase(s, name, phase, seconds):
+		with s._lock:
+			phases = s._entry(name)["phases"]
+			phases[phase] = phases.get(phase, 0.0) + seconds
+
+	def count(s, name, counter, n=1):
+		with s._lock:
+			counters = s._entry(name)["counters"]
+			counters[counter] = counters.get(counter, 0) + n
+
+	def addRender(s, name, record):
+		with s._lock:
+			s._entry(name)["renders"].append(record)
+
+	def merge(s, entities):
+		"""Adds the entities of another profile's toJSON, e.g. of a worker"""
+		for name, other in entities.items():
+			s.addWall(name, other["wall"])
+			for phase, seconds in other["phases"].items():
+				s.addPhase(name, phase, seconds)
+			for counter, n in other["counters"].items():
+				s.count(name, counter, n)
+			for record in other["renders"]:
+				s.addRender(name, record)
+
+	def clear(s):
+		with s._lock:
+			s.entities = dict()
+
+	def toJSON(s):
+		with s._lock:
+			return json.loads(json.dumps(s.entities))
+
+	def write(s, fn):
+		with open(fn, "w") as f:
+			json.dump({"entities": s.toJSON()}, f, indent=1, sort_keys=True)
+
+	def report(s, f=sys.stdout):
+		"""Prints a table of the entities, slowest first"""
+		entities = s.toJSON()
+		phases = list(Phases) + sorted(
+		  {p
+		   for entry in entities.values()
+		   for p in entry["phases"] if p not in Phases})
+		columns = ["wall"] + phases + list(Counters)
+		width = max([len("entity")] + [len(name) for name in entities])
+		f.write(f"{'entity':{width}s} " +
+		        " ".join(f"{c:>12s}" for c in columns) + "\n")
+
+		def key(item):
+			name, entry = item
+			return (-max(entry["wall"], sum(entry["phases"].values())), name)
+
+		for name, entry in sorted(entities.items(), key=key):
+			cells = [f"{entry['wall']:11.3f}s"]
+			cells += [f"{entry['phases'].get(p, 0.0):11.3f}s" for p in phases]
+			cells += [f"{entry['counters'].get(c, 0):12d}" for c in Counters]
+			f.write(f"{name:{width}s} " + " ".join(cells) + "\n")
+
+
+_DefaultProfile = BuildProfile()
+
+
+def GetDefaultProfile():
+	return _DefaultProfile
+
+
+class _State(threading.local):
+	def __init__(s):
+		s.entity = None
+		s.phases = list()
+
+
+_state = _State()
+
+
+def currentEntity():
+	"""Returns the name of the entity being built in this thread, or None"""
+	return _state.entity
+
+
+@contextlib.contextmanager
+def _entity(name, timeWall):
+	previous, phases = _state.entity, _state.phases
+	_state.entity, _state.phases = name, list()
+	t0 = time.perf_counter()
+	try:
+		yield
+	finally:
+		if timeWall:
+			_DefaultProfile.addWall(name, time.perf_counter() - t0)
+		_state.entity, _state.phases = previous, phases
+
+
+def entity(name, timeWall=True):
+	"""Attributes the phases of this thread to an entity while active"""
+	if not Profiling: return contextlib.nullcontext()
+	return _entity(name, timeWall)
+
+
+def bind(func):
+	"""Returns func wrapped to attribute its phases to the entity being built in
+	the calling thread, for running it in another thread"""
+	name = currentEntity()
+	if not Profiling or name is None: return func
+
+	def bound(*args, **kwargs):
+		with _entity(name, False):
+			return func(*args, **kwargs)
+
+	return bound
+
+
+@contextlib.contextmanager
+def _phase(name):
+	frame = [time.perf_counter(), 0.0] # start, time of nested phases
+	_state.phases.append(frame)
+	try:
+		yield
+	finally:
+		_state.phases.pop()
+		elapsed = time.perf_counter() - frame[0]
+		if len(_state.phases) > 0:
+			_state.phases[-1][1] += elapsed
+		_DefaultProfile.addPhase(_state.entity, name, elapsed - frame[1])
+
+
+def phase(name):
+	"""Times a build phase of the current entity"""
+	if not Profiling or _state.entity is None:
+		return contextlib.nullcontext()
+	return _phase(name)
+
+
+def count(counter, n=1):
+	"""Increments a counter of the current entity"""
+	if not Profiling or _state.entity is None: return
+	_DefaultProfile.count(_state.entity, counter, n)
+
+
+def render(**record):
+	"""Records a render of the current entity, e.g. its code digest, where the
+	result came from and its size"""
+	if not Profiling or _state.entity is None: return
+	_DefaultProfile.addRender(_state.entity, record)
@@ -0,0 +1,146 @@
+from . import entities
+import importlib
+import types
+import sysconfig
+import site
+import sys
+import os
+
+# set while the main script is re-executed, turning climain into a no-op
+Reloading = False
+
+_packageDirectory = os.path.dirname(
+  os.path.dirname(os.path.realpath(__file__)))
+
+
+def _libraryDirectories():
+	"""Directories of the Python installation and installed packages"""
+	res = set()
+	for key in ("stdlib", "platstdlib", "purelib", "platlib"):
+		if key in sysconfig.get_paths():
+			res.add(os.path.realpath(sysconfig.get_paths()[key]))
+	for fn in site.getsitepackages() + [site.getusersitepackages()]:
+		res.add(os.path.realpath(fn))
+	return res
+
+
+def moduleFile(module):
+	fn = getattr(module, "__file__", None)
+	if fn is None: return None
+	return os.path.realpath(fn)
+
+
+def _within(fn, directory):
+	return os.path.commonpath([fn, directory]) == directory
+
+
+def isPackageFile(fn):
+	"""Whether a file belongs to haksolid2 itself"""
+	return _within(fn, _packageDirectory)
+
+
+def userModules():
+	"""Maps the source files of loaded user modules (writable files outside of
+	haksolid2 and the Python installation, including the main script) to the
+	module names"""
+	libraries = _libraryDirectories()
+	main = sys.modules["__main__"]
+	res = dict()
+	for name, module in list(sys.modules.items()):
+		# aliases such as multiprocessing's __mp_main__
+		if module is main and name != "__main__": continue
+		fn = moduleFile(module)
+		if fn is None or not fn.endswith(".py"): continue
+		if isPackageFile(fn) or not os.access(fn, os.W_OK): continue
+		if any(_within(fn, directory) for directory in libraries): continue
+		res[fn] = name
+	return res
+
+
+def moduleDependencies(name, modules):
+	"""Returns the user modules (a subset of the module names given) a module
+	refers to through its globals, i.e. modules it imported or imported names
+	from"""
+	module = sys.modules.get(name)
+	if module is None: return set()
+	res = set()
+	for v in list(vars(module).values()):
+		if isinstance(v, types.ModuleType):
+			dependency = v.__name__
+		else:
+			dependency = getattr(v, "__module__", None)
+		if dependency in modules and dependency != name:
+			res.add(dependency)
+	return res
+
+
+def dependents(changed, modules):
+	"""Returns the modules that directly or indirectly depend on one of the
+	changed modules, including these. modules maps module names to their
+	dependencies."""
+	res = set(changed)
+	grown = True
+	while grown:
+		grown = False
+		for name, dependencies in modules.items():
+			if name not in res and not dependencies.isdisjoint(res):
+				res.add(name)
+				grown = True
+	return res
+
+
+def _dependencyOrder(names, modules):
+	res = list()
+
+	def visit(name, path):
+		if name in res or name in path: return
+		for dependency in sorted(modules.get(name, ())):
+			if dependency in names:
+				visit(dependency, path | {name})
+		res.append(name)
+
+	for name in sorted(names):
+		visit(name, set())
+	return res
+
+
+def reloadModules(changedFiles):
+	"""Reloads the user modules whose files changed along with the modules
+	depending on them, in dependency order, and re-executes the main script so
+	that its entities are registered again. Returns the set of affected module
+	names, whose entities need to be rebuilt, or None if a file not belonging to
+	a user module (e.g. of haksolid2 itself) changed and the process has to be
+	restarted instead."""
+	global Reloading
+
+	files = userModules()
+	if any(fn not in files for fn in changedFiles):
+		return None
+
+	names = set(files.values())
+	modules = {name: moduleDependencies(name, names) for name in names}
+	affected = dependents({files[fn] for fn in changedFiles}, modules)
+
+	entities.unregisterModules(affected | {"__main__"})
+	for name in _dependencyOrder(affected - {"__main__"}, modules):
+		importlib.reload(sys.modules[name])
+
+	main = sys.modules["__main__"]
+	with open(main.__file__, "r") as f:
+		code = compile(f.read(), main.__file__, "exec")
+	module = types.ModuleType("__main__")
+	module.__file__ = main.__file__
+	aliases = [name for name, v in sys.modules.items() if v is main]
+	for name in aliases:
+		sys.modules[name] = module
+	Reloading = True
+	try:
+		exec(code, vars(module))
+	except BaseException:
+		for name in aliases:
+			sys.modules[name] = main
+		raise
+	finally:
+		Reloading = False
+
+	return affected
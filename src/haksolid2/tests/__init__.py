@@ -1,4 +1,9 @@
 import unittest
 from .dag import *
 from .operations import *
-from .visitors import *
\ No newline at end of file
+from .visitors import *
+from .cache import *
+from .geometry import *
+from .imports import *
+from .reload import *
+from .cli import *
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""Microbenchmarks of hot paths, run with
+python -m unittest -v haksolid2.tests.benchmark
+These are not part of the regular test suite. They only report timings against
+their references, as these vary too much between machines to assert on."""
+from ..math import *
+from .. import usability
+import unittest
+import timeit
+import subprocess
+import sys
+import os
+
+
+def _legacyAttribute(v, attr):
+	"""Attribute lookup as done by V before swizzles were cached: a regular
+	expression match on every access, including plain numpy attributes"""
+	def resolve(key):
+		if key == "o": return 1
+		elif key == "n": return 0
+		else: return v[V.key_dimensions[key]]
+
+	if V.e_subrange.fullmatch(attr):
+		if len(attr) == 1:
+			return resolve(attr)
+		else:
+			return V(resolve(k) for k in attr)
+	else:
+		return numpy.ndarray.__getattribute__(v, attr)
+
+
+def measure(stmt, namespace, number=100000):
+	"""Returns the time per execution of a statement in nanoseconds"""
+	return timeit.timeit(stmt, globals=namespace, number=number) / number * 1e9
+
+
+def benchmarkSwizzles():
+	v = V(1, 2, 3)
+	m = M()
+	namespace = dict(v=v, m=m, legacy=_legacyAttribute)
+	res = list()
+	for attr in ("x", "xyz", "xyzo", "shape"):
+		res.append((f"V.{attr}", measure(f"v.{attr}", namespace),
+		            measure(f"legacy(v, '{attr}')", namespace)))
+	for attr in ("a12", "col4", "shape"):
+		res.append((f"M.{attr}", measure(f"m.{attr}", namespace), None))
+	return res
+
+
+def benchmarkConstruction():
+	"""Compares construction from numeric data against the element-wise path,
+	which is still taken for object arrays (and was taken for all input)"""
+	a = numpy.array([1.0, 2.0, 3.0])
+	A = numpy.identity(4)
+	namespace = dict(V=V, M=M, a=a, A=A, a_obj=a.astype(object),
+	                 A_obj=A.astype(object))
+	return [
+	  ("V(ndarray)", measure("V(a)", namespace), measure("V(a_obj)", namespace)),
+	  ("V(1, 2, 3)", measure("V(1, 2, 3)", namespace), None),
+	  ("M(ndarray)", measure("M(A)", namespace), measure("M(A_obj)", namespace)),
+	  ("M()", measure("M()", namespace), None),
+	]
+
+
+def benchmarkTransformStack():
+	"""Compares a descent/ascent pair on the preallocated stack against the list
+	of M copies used before"""
+	T = M.Translation((1, 2, 3))
+	stack = usability.TransformStack()
+	stack.append(T)
+	namespace = dict(M=M, T=T, stack=stack, legacy=[M(), T])
+	return [
+	  ("push/pop", measure("stack.append(T); stack.pop()", namespace),
+	   measure("legacy.append(M(T)); legacy.pop()", namespace)),
+	]
+
+
+def _legacyIsSymbolic(v):
+	"""isSymbolic as done before the dtype check: an isinstance test against
+	sympy.core.Expr for every cell"""
+	if isinstance(v, sympy.core.Expr):
+		return True
+	elif isinstance(v, numpy.ndarray):
+		return any(_legacyIsSymbolic(cell) for cell in v.flat)
+	return False
+
+
+def _legacySin(a):
+	if _legacyIsSymbolic(a):
+		return sympy.sin(a * sympy.pi / 180)
+	return math.sin(a * math.pi / 180)
+
+
+def benchmarkSymbolicChecks():
+	T = M.RotationZ(30)
+	namespace = dict(T=T, sin=sin, legacySin=_legacySin,
+	                 legacy=_legacyIsSymbolic)
+	return [
+	  ("M.isSymbolic", measure("T.isSymbolic", namespace),
+	   measure("legacy(T)", namespace)),
+	  ("sin(float)", measure("sin(30.0)", namespace),
+	   measure("legacySin(30.0)", namespace)),
+	]
+
+
+def measureImport(*modules, repeat=5):
+	"""Returns the best wall time of importing modules in a fresh interpreter, in
+	nanoseconds (minus the interpreter startup)"""
+	script = "\n".join([
+	  "import __main__, time",
+	  "__main__.__file__ = 'model.py'",
+	  "t0 = time.perf_counter()",
+	] + [f"import {module}" for module in modules] +
+	                   ["print(time.perf_counter() - t0)"])
+	cwd = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+	best = None
+	for _ in range(repeat):
+		out = subprocess.run([sys.executable, "-c", script],
+		                     cwd=cwd,
+		                     check=True,
+		                     capture_output=True,
+		                     text=True).stdout
+		t = float(out.strip().splitlines()[-1]) * 1e9
+		best = t if best is None else min(best, t)
+	return best
+
+
+_eagerImports = ("haksolid2", "haksolid2.openscad", "haksolid2.paradigms.lasercut",
+                 "haksolid2.paradigms.platinum", "haksolid2.paradigms.netfold",
+                 "haksolid2.paradigms.layeredcase", "haksolid2.exporters.cura",
+                 "haksolid2.exporters.freecad", "haksolid2.exporters.kicad",
+                 "haksolid2.exporters.ultralaser", "sympy", "slvs",
+                 "http.server", "urllib.request")
+
+
+def benchmarkImport():
+	"""Compares importing the core package against importing everything it
+	pulled in eagerly before (all subpackages, sympy and the optional
+	dependencies)"""
+	return [
+	  ("import haksolid2", measureImport("haksolid2"),
+	   measureImport(*_eagerImports)),
+	  ("+ openscad", measureImport("haksolid2", "haksolid2.openscad"), None),
+	]
+
+
+def report(title, results):
+	print(f"\n{title}:")
+	for name, t, reference in results:
+		line = f"  {name:24s} {t:8.0f} ns"
+		if reference is not None:
+			line += f"  (reference {reference:.0f} ns, {reference/t:.1f}x)"
+		print(line)
+
+
+class Benchmark(unittest.TestCase):
+	def test_swizzles(self):
+		# reference: per-access regular expression lookup used before
+		results = benchmarkSwizzles()
+		report("swizzles", results)
+
+	def test_construction(self):
+		results = benchmarkConstruction()
+		report("construction", results)
+
+	def test_transformStack(self):
+		results = benchmarkTransformStack()
+		report("transform stack", results)
+
+	def test_symbolicChecks(self):
+		# reference: per-cell sympy isinstance checks used before
+		results = benchmarkSymbolicChecks()
+		report("symbolic checks", results)
+
+	def test_import(self):
+		results = benchmarkImport()
+		report("import time", results)
@@ -0,0 +1,849 @@
+from .. import openscad, processing, primitives, metadata
+from ..math import *
+import unittest
+import tempfile
+import shutil
+import os
+import io
+import json
+import threading
+import signal
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+
+class DirectorySCADCacheTest(unittest.TestCase):
+	def setUp(self):
+		self.fn = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.fn)
+
+	def test_eviction(self):
+		c = openscad.DirectorySCADCache(self.fn)
+		slow = os.urandom(1000)
+		new = os.urandom(1000)
+
+		c.store("large", os.urandom(100000), False, 1)
+		c.store("slow", slow, False, 1)
+		c.store("cheap", os.urandom(1000), False, 0.01)
+		for i in range(5):
+			c.lookup("cheap")
+
+		self.assertLess(
+		  c.evictionScore(c.getMeta(c.digest("cheap"), False)[1]),
+		  c.evictionScore(c.getMeta(c.digest("slow"), False)[1]))
+
+		self.assertEqual(c.gc(maxBytes=5000), [c.digest("large")])
+		self.assertEqual(c.lookup("large"), (None, None))
+
+		self.assertEqual(c.gc(maxEntries=1), [c.digest("cheap")])
+		self.assertEqual(c.lookup("slow")[0], slow)
+
+		c.maxEntries = 1
+		c.store("new", new, False, 0.01)
+		self.assertEqual(c.lookup("slow"), (None, None))
+		self.assertEqual(c.lookup("new")[0], new)
+
+	def test_compressedMesh(self):
+		c = openscad.DirectorySCADCache(self.fn)
+
+		stl = ("solid OpenSCAD_Model\n" + "".join(
+		  f"  facet normal 0 0 1\n    outer loop\n"
+		  f"      vertex 0 0 {i}\n      vertex 1 0 {i}\n      vertex 0 1 {i}\n"
+		  f"    endloop\n  endfacet\n" for i in range(100)) +
+		       "endsolid OpenSCAD_Model\n").encode()
+
+		c.store("code", stl, True, 1)
+		meta, entry = c.getMeta(c.digest("code"), False)
+		self.assertLess(entry["cb"], len(stl))
+
+		self.assertEqual(c.lookup("code"), (stl, True))
+		vertices, indices = c.lookupMesh("code")
+		self.assertEqual(vertices.shape, (300, 3))
+		self.assertEqual(indices.shape, (100, 3))
+
+		expected = FaceSoup()
+		expected.load_stl(stl.decode())
+		soup = FaceSoup()
+		soup.load_mesh(vertices, indices)
+		self.assertEqual(len(soup.faces), len(expected.faces))
+		for a, b in zip(soup.faces, expected.faces):
+			self.assertTrue((a.normal == b.normal).all())
+			for va, vb in zip(a.vertices, b.vertices):
+				self.assertTrue((va == vb).all())
+
+	def test_legacyEntry(self):
+		c = openscad.DirectorySCADCache(self.fn)
+		c.store("code", b"data", False, 1)
+
+		meta, entry = c.getMeta(c.digest("code"), False)
+		del entry["encoding"]
+		with open(f"{self.fn}/{c.digest('code')}.dat", "wb") as f:
+			f.write(b"legacy")
+		c.setMeta(meta)
+
+		self.assertEqual(c.lookup("code"), (b"legacy", False))
+		self.assertIsNone(c.lookupMesh("code"))
+
+	def test_namespaces(self):
+		c = openscad.DirectorySCADCache(self.fn)
+		c.store("code", b"old", False, 1, "openscad-2019.05")
+		c.store("code", b"new", False, 1, "openscad-2021.01")
+		c.store("code", b"legacy", False, 1)
+
+		self.assertEqual(c.lookup("code", "openscad-2019.05")[0], b"old")
+		self.assertEqual(c.lookup("code", "openscad-2021.01")[0], b"new")
+		self.assertEqual(c.lookup("code")[0], b"legacy")
+		self.assertEqual(set(c.namespaces()),
+		                 {"", "openscad-2019.05", "openscad-2021.01"})
+
+		c.evictNamespace("openscad-2019.05")
+		self.assertEqual(c.lookup("code", "openscad-2019.05"), (None, None))
+		self.assertEqual(c.lookup("code", "openscad-2021.01")[0], b"new")
+
+	def test_processes(self):
+		# build workers (climain -j) store into one cache directory concurrently
+		def work(i):
+			c = openscad.DirectorySCADCache(self.fn)
+			for j in range(20):
+				c.store(f"{i}-{j}", f"{i}-{j}".encode(), False, 1)
+
+		ctx = multiprocessing.get_context("fork")
+		workers = [ctx.Process(target=work, args=(i, )) for i in range(4)]
+		for worker in workers:
+			worker.start()
+		for worker in workers:
+			worker.join()
+
+		c = openscad.DirectorySCADCache(self.fn)
+		self.assertEqual(len(c.getMeta()["entries"]), 80)
+		self.assertEqual(c.lookup("3-19")[0], b"3-19")
+
+	def test_forkedScratch(self):
+		fn = openscad.cache._scratchDirectory()
+		ctx = multiprocessing.get_context("fork")
+		with ProcessPoolExecutor(1, mp_context=ctx) as executor:
+			fn_worker = executor.submit(openscad.cache._scratchDirectory).result()
+		self.assertNotEqual(fn_worker, fn)
+		self.assertFalse(os.path.exists(fn_worker))
+		self.assertTrue(os.path.isdir(fn))
+
+
+class STLTest(unittest.TestCase):
+	def test_binary(self):
+		triangles = numpy.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]],
+		                         [[0, 0, 1], [1, 0, 1], [0, 1, 1.5]]])
+		normals = numpy.array([[0, 0, 1], [0, 0, 1]])
+
+		records = numpy.zeros(2, dtype=[("normal", "<f4", (3, )),
+		                                ("vertices", "<f4", (3, 3)),
+		                                ("attribute", "<u2")])
+		records["normal"] = normals
+		records["vertices"] = triangles
+		binary = b"solid binary header".ljust(80, b" ") + numpy.array(
+		  [2], dtype="<u4").tobytes() + records.tobytes()
+		ascii = "solid ascii\n" + "".join(
+		  f"facet normal {n[0]} {n[1]} {n[2]}\nouter loop\n" +
+		  "".join(f"vertex {x} {y} {z}\n"
+		          for x, y, z in tri) + "endloop\nendfacet\n"
+		  for n, tri in zip(normals, triangles)) + "endsolid ascii\n"
+
+		for data in (binary, ascii, ascii.encode()):
+			soup = FaceSoup()
+			soup.load_stl(data)
+			self.assertEqual(len(soup.faces), 2)
+			for face, n, tri in zip(soup.faces, normals, triangles):
+				self.assertTrue((face.normal == n).all())
+				self.assertTrue((numpy.array(face.vertices) == tri).all())
+
+	def test_loops(self):
+		quad = ("solid quad\nfacet normal 0 0 1\nouter loop\n"
+		        "vertex 0 0 0\nvertex 1 0 0\nvertex 1 1 0\nvertex 0 1 0\n"
+		        "endloop\nendfacet\nendsolid quad\n")
+		soup = FaceSoup()
+		soup.load_stl(quad)
+		self.assertEqual(len(soup.faces), 1)
+		self.assertEqual(len(soup.faces[0].vertices), 4)
+
+		with self.assertRaises(SyntaxError):
+			FaceSoup().load_stl("facet normal 0 0 1")
+
+
+class IndexedMeshTest(unittest.TestCase):
+	Tetrahedron = numpy.array([[[0, 0, 0], [0, 1, 0], [1, 0, 0]],
+	                           [[0, 0, 0], [0, 0, 1], [0, 1, 0]],
+	                           [[0, 0, 0], [1, 0, 0], [0, 0, 1]],
+	                           [[1, 0, 0], [0, 1, 0], [0, 0, 1]]],
+	                          dtype=float)
+
+	def test_welding(self):
+		mesh = IndexedMesh.FromTriangles(self.Tetrahedron)
+		self.assertEqual(mesh.vertices.shape, (4, 3))
+		self.assertEqual(mesh.indices.shape, (4, 3))
+		self.assertTrue((mesh.triangles == self.Tetrahedron).all())
+		self.assertAlmostEqual(mesh.computeVolume(), 1 / 6)
+
+		mesh.load_triangles(None, self.Tetrahedron + (1, 0, 0))
+		self.assertEqual(mesh.vertices.shape, (7, 3))
+		self.assertEqual(len(mesh.faces), 8)
+		self.assertAlmostEqual(mesh.computeVolume(), 2 / 6)
+
+		soup = FaceSoup()
+		soup.load_triangles(mesh.normals, mesh.triangles)
+		self.assertAlmostEqual(soup.computeVolume(), mesh.computeVolume())
+		self.assertTrue(
+		  (IndexedMesh.FromFaceSoup(soup).vertices == mesh.vertices).all())
+
+	def test_modifyFaces(self):
+		mesh = IndexedMesh.FromTriangles(self.Tetrahedron)
+		other = IndexedMesh.FromTriangles(self.Tetrahedron + (1, 0, 0))
+
+		mesh.faces.extend(other.faces)
+		self.assertEqual(mesh.vertices.shape, (7, 3))
+		self.assertAlmostEqual(mesh.computeVolume(), 2 / 6)
+		mesh.faces.pop()
+		self.assertEqual(mesh.indices.shape, (7, 3))
+
+		mesh.faces = list(other.faces)
+		self.assertTrue((mesh.triangles == other.triangles).all())
+		mesh.transform(M.Translation((1, 0, 0)))
+		self.assertTrue((mesh.triangles == self.Tetrahedron + (2, 0, 0)).all())
+
+		with self.assertRaises(ValueError):
+			mesh.faces = [face_t(V(0, 0, 1), (V(0, 0, 0), V(1, 0, 0)))]
+
+	def test_transform(self):
+		mesh = IndexedMesh.FromTriangles(self.Tetrahedron)
+		faces = mesh.faces
+		copy = mesh.copy()
+		copy.transform(M.Translation((1, 2, 3)) @ M.RotationZ(90))
+
+		self.assertIs(mesh.faces, faces)
+		self.assertTrue((mesh.triangles == self.Tetrahedron).all())
+		self.assertAlmostEqual(copy.computeVolume(), 1 / 6)
+		for a, b in zip(copy.faces, faces):
+			for va, vb in zip(a.vertices, b.vertices):
+				self.assertTrue(
+				  numpy.allclose(numpy.asarray(va), (1 - vb.y, 2 + vb.x, 3 + vb.z)))
+			self.assertTrue(
+			  numpy.allclose(numpy.asarray(a.normal),
+			                 (-b.normal.y, b.normal.x, b.normal.z)))
+
+
+class GeometryCacheTest(unittest.TestCase):
+	def test_lru(self):
+		soup = FaceSoup()
+		soup.faces.append(face_t(V(0, 0, 1), (V(0, 0), V(1, 0), V(0, 1))))
+
+		l1 = openscad.GeometryCache(maxBytes=2 * (soup.nbytes + 100))
+		l1.store("a", b"x" * 100, soup)
+		l1.store("b", b"x" * 100, soup)
+		self.assertIsNotNone(l1.lookup("a"))
+		l1.store("c", b"x" * 100, soup)
+
+		self.assertIsNone(l1.lookup("b"))
+		self.assertEqual(len(l1), 2)
+		self.assertEqual((l1.hits, l1.misses), (1, 1))
+		self.assertEqual(l1.cb, 2 * (soup.nbytes + 100))
+
+		raw, cached = l1.lookup("c")
+		cached.transform(M.Translation((1, 0, 0)))
+		self.assertEqual(l1.lookup("c")[1].faces, soup.faces)
+
+	def test_modifyMesh(self):
+		mesh = IndexedMesh.FromTriangles([[[0, 0, 0], [1, 0, 0], [0, 1, 0]]])
+		l1 = openscad.GeometryCache()
+		l1.store("a", b"raw", mesh)
+		mesh.vertices += 1
+
+		_, cached = l1.lookup("a")
+		self.assertEqual(cached.vertices.min(), 0)
+		cached.vertices += 1
+		cached.normals[0] *= -1
+		_, cached = l1.lookup("a")
+		self.assertEqual(cached.vertices.min(), 0)
+		self.assertEqual(tuple(cached.normals[0]), (0, 0, 1))
+
+	def test_render(self):
+		l1 = openscad.GeometryCache()
+		soup = FaceSoup()
+		namespace = openscad.cache.GetRenderNamespace()
+		l1.store((openscad.cache.codeDigest("code", namespace), False), b"raw",
+		         soup)
+
+		raw, cached = openscad.RenderSCADCode("code",
+		                                      False,
+		                                      decode=True,
+		                                      geometryCache=l1)
+		self.assertEqual(raw, b"raw")
+		self.assertIsInstance(cached, FaceSoup)
+		self.assertEqual(l1.hits, 1)
+
+
+class CapabilitiesTest(unittest.TestCase):
+	HelpText = """Usage: openscad [options] file.scad
+Allowed options:
+  --export-format arg               overrides format of exported scad file when
+                                    using option '-o', arg can be any of its
+                                    supported file extensions.  For ascii stl
+                                    export, specify 'asciistl', and for binary
+                                    stl export, specify 'binstl'.
+  -o [ --o ] arg                    output specified file instead of running
+                                    the GUI, the file extension specifies the
+                                    type: stl, off, wrl, amf, 3mf, csg, dxf,
+                                    svg, pdf, png, echo, ast, term, nef3,
+                                    nefdbg
+  --backend arg                     3D rendering backend to use: 'CGAL'
+                                    (old/slow) [default] or 'Manifold'
+                                    (new/fast)
+  --cache arg                       cache mode
+"""
+
+	def test_probe(self):
+		fn = tempfile.mkdtemp()
+		try:
+			fn_binary = os.path.join(fn, "openscad")
+			with open(fn_binary, "w") as f:
+				f.write("#!/bin/sh\n"
+				        "if [ \"$1\" = --version ]; then\n"
+				        "  echo 'OpenSCAD version 2024.12.06' >&2\n"
+				        "else\n"
+				        f"  cat >&2 <<'EOF'\n{self.HelpText}EOF\n"
+				        "fi\n")
+			os.chmod(fn_binary, 0o755)
+
+			caps = openscad.ProbeCapabilities(fn_binary)
+		finally:
+			shutil.rmtree(fn)
+
+		self.assertTrue(caps.available)
+		self.assertEqual(caps.version, "2024.12.06")
+		self.assertEqual(caps.versionTuple, (2024, 12, 6))
+		self.assertTrue(caps.cache)
+		self.assertTrue({"stl", "svg", "csg", "binstl", "asciistl"} <=
+		                caps.exportFormats)
+		self.assertEqual(caps.backends, ("CGAL", "Manifold"))
+
+		missing = openscad.ProbeCapabilities(os.path.join(fn, "openscad"))
+		self.assertFalse(missing.available)
+
+
+class SharedSCADCacheTest(unittest.TestCase):
+	def setUp(self):
+		self.fn = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.fn)
+
+	def makeCache(self, name, store, **kwargs):
+		return openscad.SharedSCADCache(
+		  openscad.DirectorySCADCache(os.path.join(self.fn, name)), store,
+		  **kwargs)
+
+	def test_readThrough(self):
+		store = openscad.DirectoryContentStore(os.path.join(self.fn, "shared"))
+		a = self.makeCache("a", store)
+		b = self.makeCache("b", store)
+
+		a.store("code", b"result", False, 3, "ns")
+		a.flush()
+
+		self.assertEqual(b.lookup("code", "other"), (None, None))
+		self.assertEqual(b.lookup("code", "ns"), (b"result", False))
+		self.assertEqual(b.remoteHits, 1)
+		self.assertEqual(b.local.lookup("code", "ns"), (b"result", False))
+
+		digest = a.local.digest("code", "ns")
+		blob = bytearray(store.get(digest))
+		blob[-5] ^= 0xff
+		store.put(digest, bytes(blob))
+		c = self.makeCache("c", store)
+		self.assertEqual(c.lookup("code", "ns"), (None, None))
+		self.assertEqual(c.remoteErrors, 1)
+
+	def test_http(self):
+		server = openscad.ServeContentStore(
+		  openscad.DirectoryContentStore(os.path.join(self.fn, "shared")),
+		  ("127.0.0.1", 0))
+		threading.Thread(target=server.serve_forever, daemon=True).start()
+		try:
+			store = openscad.HTTPContentStore(
+			  f"http://127.0.0.1:{server.server_address[1]}")
+			a = self.makeCache("a", store)
+			b = self.makeCache("b", store)
+
+			a.store("code", b"result", True, 3)
+			a.flush()
+			self.assertEqual(b.lookup("code"), (b"result", True))
+			self.assertEqual(b.lookup("missing"), (None, None))
+		finally:
+			server.shutdown()
+			server.server_close()
+
+	def test_timeout(self):
+		class SlowStore(openscad.ContentStore):
+			def get(self, digest):
+				time.sleep(1)
+
+		c = self.makeCache("c", SlowStore(), timeout=0.05)
+		t0 = time.time()
+		self.assertEqual(c.lookup("code"), (None, None))
+		self.assertLess(time.time() - t0, 0.5)
+
+	def test_circuitBreaker(self):
+		class UnreachableStore(openscad.ContentStore):
+			gets = 0
+
+			def get(self, digest):
+				self.gets += 1
+				raise OSError("unreachable")
+
+		store = UnreachableStore()
+		c = self.makeCache("c", store, maxFailures=2, backoff=0.2)
+		for i in range(5):
+			self.assertEqual(c.lookup(f"code{i}"), (None, None))
+		self.assertEqual(store.gets, 2)
+		self.assertEqual(c.remoteErrors, 2)
+		self.assertEqual(c.remoteSkips, 3)
+
+		time.sleep(0.3)
+		self.assertEqual(c.lookup("code"), (None, None))
+		self.assertEqual(store.gets, 3)
+
+
+class FakeOpenSCAD:
+	"""Context manager placing a shell script named openscad in front of PATH.
+	The script copies its input file to the file given with -o, or stdin to
+	stdout when invoked with --export-format, and counts these calls."""
+	Script = ('#!/bin/sh\ncase "$1" in -o|--export-format) ;; *) exit 0 ;; esac\n'
+	          'echo >> "$(dirname "$0")/calls"\nsleep {delay}\n'
+	          'if [ "$1" = -o ]; then cp "$3" "$2"; else cat; fi\n')
+
+	def __init__(self, delay=0):
+		self.delay = delay
+
+	def __enter__(self):
+		self.fn = tempfile.mkdtemp()
+		with open(os.path.join(self.fn, "openscad"), "w") as f:
+			f.write(self.Script.format(delay=self.delay))
+		os.chmod(os.path.join(self.fn, "openscad"), 0o755)
+		self.path = os.environ["PATH"]
+		os.environ["PATH"] = self.fn + os.pathsep + self.path
+		openscad.capabilities.Capabilities = None
+		return self
+
+	def __exit__(self, *args):
+		os.environ["PATH"] = self.path
+		openscad.capabilities.Capabilities = None
+		shutil.rmtree(self.fn)
+
+	@property
+	def calls(self):
+		if not os.path.exists(os.path.join(self.fn, "calls")): return 0
+		with open(os.path.join(self.fn, "calls")) as f:
+			return len(f.read())
+
+
+class RenderTest(unittest.TestCase):
+	def test_threadedRaw(self):
+		cwd = os.getcwd()
+		results = dict()
+
+		def render(i):
+			results[i] = openscad.RenderSCADCode_raw(f"cube({i});",
+			                                         "out.stl",
+			                                         useCache=False)
+
+		with FakeOpenSCAD():
+			threads = [threading.Thread(target=render, args=(i, )) for i in range(8)]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+
+		self.assertEqual(os.getcwd(), cwd)
+		self.assertEqual(results, {i: f"cube({i});".encode() for i in range(8)})
+
+	def test_scheduler(self):
+		scheduler = openscad.RenderScheduler(maxWorkers=4)
+		with FakeOpenSCAD(delay=0.2) as fake:
+			futures = [
+			  scheduler.submit(f"cube({i % 3});", False, useCache=False)
+			  for i in range(6)
+			]
+			results = [future.result() for future in futures]
+			self.assertEqual(fake.calls, 3)
+		scheduler.shutdown()
+
+		self.assertEqual(results, [f"cube({i % 3});".encode() for i in range(6)])
+
+	def test_buildSubmit(self):
+		proc = openscad.OpenSCADBuild(outputFile=False,
+		                              outputRaw=True,
+		                              useCache=False)
+		node = processing.EntityNode(proc)
+		node * primitives.cuboid(1, 2, 3)
+		ent = processing.EntityRecord(processing.EntityNode, node, "", "", proc)
+
+		code, is3d = proc.generateCode(ent)
+		self.assertTrue(is3d)
+		with FakeOpenSCAD():
+			res = proc.submit(ent).result()
+		self.assertEqual(res.data["raw"], code.encode())
+
+	def test_submitPresets(self):
+		proc = openscad.OpenSCADBuild(outputFile=False,
+		                              outputRaw=True,
+		                              useCache=False)
+		node = processing.EntityNode(proc)
+		node * metadata.variable("size", 1)
+		node * primitives.cuboid(1)
+		ent = processing.EntityRecord(processing.EntityNode, node, "part", "", proc)
+
+		code, is3d = proc.generateCode(ent)
+		with FakeOpenSCAD() as fake:
+			futures = proc.submitPresets(ent, {
+			  "small": {
+			    "size": "2"
+			  },
+			  "large": {
+			    "size": "3",
+			    "undeclared": "4"
+			  },
+			})
+			results = {k: v.result() for k, v in futures.items()}
+			self.assertEqual(fake.calls, 2)
+		self.assertEqual(results["small"].data["raw"], (code + "size = 2;\n").encode())
+		self.assertEqual(results["large"].data["raw"], (code + "size = 3;\n").encode())
+
+	def test_profile(self):
+		fn = tempfile.mkdtemp()
+		profile = processing.GetDefaultProfile()
+		profile.clear()
+		processing.profiling.Profiling = True
+		try:
+			cache = openscad.DirectorySCADCache(os.path.join(fn, "cache"))
+			proc = openscad.OpenSCADBuild(useCache=False,
+			                              rawCache=cache,
+			                              outputDirectory=os.path.join(fn, "out"))
+
+			def part():
+				node = processing.EntityNode(proc)
+				node * primitives.cuboid(1)
+				return node
+
+			ent = processing.EntityRecord(processing.part, part, "part", "", proc)
+			with FakeOpenSCAD():
+				processing.buildEntity(ent)
+				processing.manifest.Force = True
+				try:
+					processing.buildEntity(ent.namedCopy("copy"))
+				finally:
+					processing.manifest.Force = False
+				processing.buildEntity(ent)
+
+			entities = profile.toJSON()
+			self.assertEqual(set(entities), {"part", "copy"})
+			entry = entities["part"]
+			self.assertEqual(entry["counters"]["renders"], 1)
+			self.assertEqual(entry["counters"]["cache misses"], 1)
+			self.assertEqual(entities["copy"]["counters"]["cache hits"], 1)
+			self.assertGreater(entry["counters"]["code bytes"], 0)
+			self.assertGreater(entry["counters"]["output bytes"], 0)
+			for phase in ("construct", "codegen", "dimensions", "openscad", "export"):
+				self.assertIn(phase, entry["phases"])
+			self.assertGreaterEqual(entry["wall"], sum(entry["phases"].values()))
+			self.assertEqual([r["source"] for r in entry["renders"]], ["openscad"])
+			self.assertEqual(entities["copy"]["renders"][0]["source"], "render cache")
+
+			out = io.StringIO()
+			profile.report(out)
+			self.assertEqual(len(out.getvalue().splitlines()), 3)
+			profile.write(os.path.join(fn, "profile.json"))
+			with open(os.path.join(fn, "profile.json")) as f:
+				self.assertEqual(json.load(f)["entities"], entities)
+		finally:
+			processing.profiling.Profiling = False
+			profile.clear()
+			shutil.rmtree(fn)
+
+	def test_profileRenderModule(self):
+		class STLOpenSCAD(FakeOpenSCAD):
+			Script = ('#!/bin/sh\ncase "$1" in -o|--export-format) ;; *) exit 0 ;; esac\n'
+			          'echo >> "$(dirname "$0")/calls"\n'
+			          'if [ "$1" = -o ]; then exec > "$2"; fi\n'
+			          'printf "solid a\\nendsolid a\\n"\n')
+
+		fn = tempfile.mkdtemp()
+		profile = processing.GetDefaultProfile()
+		profile.clear()
+		processing.profiling.Profiling = True
+		try:
+			proc = openscad.OpenSCADBuild(useCache=False,
+			                              outputDirectory=os.path.join(fn, "out"))
+
+			def part():
+				openscad.OpenSCADBuild.RenderModule(primitives.cuboid(2), useCache=False)
+				node = processing.EntityNode(proc)
+				node * primitives.cuboid(1)
+				return node
+
+			ent = processing.EntityRecord(processing.part, part, "part", "", proc)
+			with STLOpenSCAD() as fake:
+				processing.buildEntity(ent)
+				self.assertEqual(fake.calls, 2)
+
+			# the sub-render counts to the part rather than a nameless entity
+			entities = profile.toJSON()
+			self.assertEqual(set(entities), {"part"})
+			self.assertEqual(entities["part"]["counters"]["renders"], 2)
+			self.assertIn("decode", entities["part"]["phases"])
+		finally:
+			processing.profiling.Profiling = False
+			profile.clear()
+			shutil.rmtree(fn)
+
+	def test_importedFiles(self):
+		fn = tempfile.mkdtemp()
+		try:
+			fn_mesh = os.path.join(fn, "mesh.stl")
+			proc = openscad.OpenSCADBuild(outputFile=False, useCache=False)
+			node = processing.EntityNode(proc)
+			node * primitives.geometryImport(fn_mesh)
+			ent = processing.EntityRecord(processing.EntityNode, node, "", "", proc)
+
+			with open(fn_mesh, "w") as f:
+				f.write("solid a\nendsolid a\n")
+			code, is3d = proc.generateCode(ent)
+			self.assertIn(f"import(\"{fn_mesh}\")", code)
+			self.assertEqual(code, proc.generateCode(ent)[0])
+			self.assertNotIn(f"// {fn_mesh}", code)
+			with open(fn_mesh, "w") as f:
+				f.write("solid bb\nendsolid bb\n")
+			self.assertNotEqual(code, proc.generateCode(ent)[0])
+		finally:
+			shutil.rmtree(fn)
+
+	def test_timeout(self):
+		fn = tempfile.mkdtemp()
+		try:
+			c = openscad.DirectorySCADCache(fn)
+			with FakeOpenSCAD(delay=5) as fake:
+				t0 = time.time()
+				with self.assertRaises(openscad.RenderTimeoutError):
+					openscad.RenderSCADCode("cube(1);", True, c, False, timeout=0.2)
+				self.assertLess(time.time() - t0, 2)
+				namespace = openscad.cache.GetRenderNamespace(False)
+				self.assertEqual(c.lookupTimeout("cube(1);", namespace), 0.2)
+
+				with self.assertRaises(openscad.RenderTimeoutError):
+					openscad.RenderSCADCode("cube(1);", True, c, False, timeout=0.1)
+				self.assertEqual(fake.calls, 1)
+		finally:
+			shutil.rmtree(fn)
+
+	def test_memoryLimit(self):
+		class FailingOpenSCAD(FakeOpenSCAD):
+			Script = ('#!/bin/sh\ncase "$1" in -o|--export-format) ;; *) exit 0 ;; esac\n'
+			          'echo >> "$(dirname "$0")/calls"\nsleep {delay}\nexit 1\n')
+
+		fn = tempfile.mkdtemp()
+		try:
+			c = openscad.DirectorySCADCache(fn)
+			namespace = openscad.cache.GetRenderNamespace(False)
+			with FailingOpenSCAD() as fake:
+				for i in range(2):
+					with self.assertRaises(RuntimeError):
+						openscad.RenderSCADCode("cube(1);",
+						                        True,
+						                        c,
+						                        False,
+						                        memoryLimit=1 << 30)
+				# possibly caused by the limit, so not cached as a failure
+				self.assertEqual(fake.calls, 2)
+				self.assertEqual(c.lookup("cube(1);", namespace), (None, None))
+
+				with self.assertRaises(RuntimeError):
+					openscad.RenderSCADCode("cube(1);", True, c, False)
+				self.assertEqual(c.lookup("cube(1);", namespace), (b"", None))
+		finally:
+			shutil.rmtree(fn)
+
+	def test_interrupt(self):
+		class PidOpenSCAD(FakeOpenSCAD):
+			Script = ('#!/bin/sh\ncase "$1" in -o|--export-format) ;; *) exit 0 ;; esac\n'
+			          'echo $$ > "$(dirname "$0")/pid"\nsleep {delay}\n')
+
+		def interrupt(signum, frame):
+			raise KeyboardInterrupt()
+
+		previous = signal.signal(signal.SIGALRM, interrupt)
+		try:
+			with PidOpenSCAD(delay=5) as fake:
+				t0 = time.time()
+				signal.setitimer(signal.ITIMER_REAL, 0.3)
+				with self.assertRaises(KeyboardInterrupt):
+					openscad.RenderSCADCode_raw("cube(1);", "out.stl", useCache=False)
+				self.assertLess(time.time() - t0, 2)
+				with open(os.path.join(fake.fn, "pid")) as f:
+					pid = int(f.read())
+			# killed and reaped rather than left running in its own session
+			with self.assertRaises(ProcessLookupError):
+				os.kill(pid, 0)
+		finally:
+			signal.setitimer(signal.ITIMER_REAL, 0)
+			signal.signal(signal.SIGALRM, previous)
+
+	def test_cancel(self):
+		scheduler = openscad.RenderScheduler(maxWorkers=1)
+		with FakeOpenSCAD(delay=5) as fake:
+			t0 = time.time()
+			running = scheduler.submit("cube(1);", False, useCache=False)
+			pending = scheduler.submit("cube(2);", False, useCache=False)
+			while fake.calls < 1:
+				time.sleep(0.01)
+			self.assertTrue(pending.cancel())
+			self.assertTrue(running.cancel())
+			scheduler.shutdown()
+			self.assertLess(time.time() - t0, 2)
+			self.assertEqual(fake.calls, 1)
+		self.assertTrue(running.cancelled())
+
+	def test_backend(self):
+		tetrahedron = (
+		  ((0, 0, 0), (0, 1, 0), (1, 0, 0)),
+		  ((0, 0, 0), (0, 0, 1), (0, 1, 0)),
+		  ((0, 0, 0), (1, 0, 0), (0, 0, 1)),
+		  ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+		)
+		# the fake binary copies its input, so the code doubles as the rendered STL
+		stl = ("solid t\n" + "".join(
+		  "facet normal 0 0 0\nouter loop\n" +
+		  "".join(f"vertex {x} {y} {z}\n"
+		          for x, y, z in face) + "endloop\nendfacet\n"
+		  for face in tetrahedron) + "endsolid t\n")
+		fn = tempfile.mkdtemp()
+		try:
+			c = openscad.DirectorySCADCache(fn)
+			with FakeOpenSCAD() as fake:
+				openscad.capabilities.Capabilities = openscad.capabilities_t(
+				  True, "2024.12.06", (2024, 12, 6), False, frozenset({"stl", "svg"}),
+				  ("CGAL", "Manifold"))
+				self.assertEqual(openscad.ResolveBackend("manifold"), "Manifold")
+				with self.assertRaises(ValueError):
+					openscad.RenderSCADCode(stl, True, c, backend="nonexistent")
+
+				for backend in ("CGAL", "manifold"):
+					openscad.RenderSCADCode(stl, True, c, backend=backend)
+				self.assertEqual(
+				  set(c.namespaces()), {
+				    "openscad-2024.12.06 --backend=CGAL",
+				    "openscad-2024.12.06 --backend=Manifold"
+				  })
+
+				records = openscad.BenchmarkBackends(stl, True)
+				self.assertEqual(fake.calls, 4)
+		finally:
+			shutil.rmtree(fn)
+
+		self.assertEqual([r.backend for r in records], ["CGAL", "Manifold"])
+		for record in records:
+			self.assertIsNone(record.error)
+			self.assertTrue(record.equivalent)
+			self.assertAlmostEqual(record.volume, 1 / 6)
+			self.assertEqual(tuple(record.bounds.max), (1, 1, 1))
+
+	def test_scratch(self):
+		with FakeOpenSCAD() as fake:
+			raw = openscad.RenderSCADCode_raw("cube(1);", "out.stl", useCache=False)
+			fn = openscad.cache._scratchDirectory()
+			self.assertEqual(raw, b"cube(1);")
+			self.assertEqual(os.listdir(fn), ["code.scad"])
+
+			openscad.capabilities.Capabilities = openscad.capabilities_t(
+			  True, "2021.01", (2021, 1), False, frozenset({"stl", "asciistl"}), ())
+			os.unlink(os.path.join(fn, "code.scad"))
+			raw = openscad.RenderSCADCode_raw("cube(2);", "out.stl", useCache=False)
+			self.assertEqual(raw, b"cube(2);")
+			self.assertEqual(openscad.cache._scratchDirectory(), fn)
+			self.assertEqual(os.listdir(fn), [])
+			self.assertEqual(fake.calls, 2)
+
+	def test_binarySTL(self):
+		class FormatOpenSCAD(FakeOpenSCAD):
+			Script = ('#!/bin/sh\ncase "$1" in --export-format) ;; *) exit 0 ;; esac\n'
+			          'echo >> "$(dirname "$0")/calls"\nsleep {delay}\nprintf "$2"\n')
+
+		with FormatOpenSCAD():
+			openscad.capabilities.Capabilities = openscad.capabilities_t(
+			  True, "2021.01", (2021, 1), False,
+			  frozenset({"stl", "asciistl", "binstl"}), ())
+			self.assertEqual(
+			  openscad.RenderSCADCode_raw("cube(1);", "out.stl", useCache=False),
+			  b"binstl")
+			self.assertEqual(
+			  openscad.RenderSCADCode_raw("cube(1);",
+			                              "out.stl",
+			                              useCache=False,
+			                              binarySTL=False), b"asciistl")
+
+		# output files and raw data keep the ASCII format
+		cases = [
+		  (dict(), False),
+		  (dict(outputFile=False, outputRaw=True), False),
+		  (dict(outputFile=False, outputGeometry=True), True),
+		]
+		for kwargs, binary in cases:
+			proc = openscad.OpenSCADBuild(**kwargs)
+			self.assertEqual(proc._renderArguments()["binarySTL"], binary)
+
+	def test_manifest(self):
+		fn = tempfile.mkdtemp()
+		try:
+			proc = openscad.OpenSCADBuild(useCache=False, outputDirectory=fn)
+
+			def build(size, name="part"):
+				node = processing.EntityNode(proc)
+				node * primitives.cuboid(size)
+				return processing.buildEntity(
+				  processing.EntityRecord(processing.EntityNode, node, name, "", proc))
+
+			with FakeOpenSCAD() as fake:
+				self.assertFalse(build(1).skipped)
+				res = build(1)
+				self.assertTrue(res.skipped)
+				self.assertEqual(res.files, [os.path.join(fn, "part.stl")])
+				self.assertEqual(fake.calls, 1)
+
+				# unchanged outputs are not rehashed, even by a new process
+				processing.manifest._fileDigests.clear()
+				fileDigest = processing.manifest.fileDigest
+				hashed = list()
+				processing.manifest.fileDigest = lambda fn: hashed.append(fn) or fileDigest(
+				  fn)
+				try:
+					self.assertTrue(build(1).skipped)
+				finally:
+					processing.manifest.fileDigest = fileDigest
+				self.assertEqual(hashed, [])
+
+				self.assertFalse(build(2).skipped)
+				with open(os.path.join(fn, "part.stl"), "ab") as f:
+					f.write(b"modified")
+				self.assertFalse(build(2).skipped)
+				self.assertFalse(build(2, "other").skipped)
+
+				processing.manifest.Force = True
+				try:
+					self.assertFalse(build(2).skipped)
+				finally:
+					processing.manifest.Force = False
+				self.assertEqual(fake.calls, 5)
+
+			entry = processing.GetManifest(fn).entry("part")
+			self.assertEqual(list(entry["files"]), ["part.stl"])
+			self.assertTrue(entry["parameters"]["is3d"])
+		finally:
+			shutil.rmtree(fn)
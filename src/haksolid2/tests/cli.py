@@ -0,0 +1,53 @@
+from .reload import runProject
+import importlib.util
+import unittest
+
+# two parts built by spawned workers of buildParallel, whose console output,
+# outputs and manifest entries have to reach the parent
+ParallelSources = {
+  "main.py":
+  """
+  import sys, os, io, contextlib
+  sys.dont_write_bytecode = True
+  from haksolid2 import processing, primitives, openscad
+  from haksolid2.processing import cli
+  from haksolid2.tests.cache import FakeOpenSCAD
+
+  proc = openscad.OpenSCADBuild(useCache=False, outputDirectory="out")
+
+  @processing.part.module(process=proc)
+  def first():
+  	print("render workers", openscad.GetDefaultScheduler().maxWorkers)
+  	~primitives.cuboid(1)
+
+  @processing.part.module(process=proc)
+  def second():
+  	~primitives.cuboid(2)
+
+  if __name__ == "__main__":
+  	openscad.RenderScheduler.DefaultMaxWorkers = 4
+  	ents = processing.entities.getEntities()
+  	jobs = [(ents["first"], None, None), (ents["second"], None, None)]
+
+  	out = io.StringIO()
+  	with FakeOpenSCAD(), contextlib.redirect_stdout(out):
+  		assert cli.buildParallel(jobs, 2) == (0, 0)
+  		assert cli.buildParallel(jobs, 2) == (0, 2)
+  	# each worker gets its share of the render threads
+  	assert "render workers 2" in out.getvalue(), out.getvalue()
+  	assert "[2/2] second: up to date" in out.getvalue(), out.getvalue()
+
+  	manifest = processing.GetManifest(proc.getOutputDirectory(True))
+  	for name in ("first", "second"):
+  		fn = os.path.join(proc.getOutputDirectory(True), name + ".stl")
+  		assert os.path.isfile(fn)
+  		assert list(manifest.entry(name)["files"]) == [name + ".stl"]
+  """,
+}
+
+
+@unittest.skipIf(importlib.util.find_spec("cli") is None,
+                 "the cli package is not installed")
+class ParallelBuildTest(unittest.TestCase):
+	def test_buildParallel(self):
+		runProject(ParallelSources)
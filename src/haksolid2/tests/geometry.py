@@ -0,0 +1,138 @@
+from ..math import *
+import unittest
+import subprocess
+import sys
+import os
+
+
+class TransformTest(unittest.TestCase):
+	T = M.Translation((1, 2, 3)) @ M.RotationZ(90) @ M.Scale(2)
+
+	def test_applyPoints(self):
+		points = numpy.array([[0, 0, 0], [1, 0, 0], [0, 1, 1]], dtype=float)
+		expected = [(self.T @ V(*p, 1)).xyz for p in points]
+		self.assertTrue(numpy.allclose(self.T.applyPoints(points), expected))
+
+		expected = [(self.T @ V(*p, 0)).xyz for p in points]
+		self.assertTrue(numpy.allclose(self.T.applyPoints(points, w=0), expected))
+
+		expected = [(self.T @ V(*p[:2], 0, 1)).xyz for p in points]
+		self.assertTrue(numpy.allclose(self.T.applyPoints(points[:, :2]), expected))
+
+	def test_soup(self):
+		soup = FaceSoup()
+		soup.faces.append(face_t(V(0, 0, 1), [V(0, 0), V(1, 0), V(1, 1), V(0, 1)]))
+		soup.faces.append(face_t(V(1, 0, 0), (V(0, 0, 0), V(0, 1, 0), V(0, 0, 1))))
+		expected = [
+		  face_t((self.T @ face.normal.xyzn).xyz,
+		         tuple((self.T @ (v.xyno if len(v) < 3 else v.xyzo)).xyz
+		               for v in face.vertices)) for face in soup.faces
+		]
+
+		soup.transform(self.T)
+		self.assertEqual(len(soup.faces), 2)
+		for face, reference in zip(soup.faces, expected):
+			self.assertIsInstance(face.vertices, tuple)
+			self.assertEqual(len(face.vertices), len(reference.vertices))
+			self.assertTrue(
+			  numpy.allclose(numpy.asarray(face.normal),
+			                 numpy.asarray(reference.normal)))
+			for v, w in zip(face.vertices, reference.vertices):
+				self.assertIsInstance(v, V)
+				self.assertTrue(numpy.allclose(numpy.asarray(v), numpy.asarray(w)))
+
+	def test_aabb(self):
+		box = aabb_t(V(0, 0, 0), V(1, 2, 3)) * self.T
+		self.assertTrue(numpy.allclose(numpy.asarray(box.min), (-3, 2, 3)))
+		self.assertTrue(numpy.allclose(numpy.asarray(box.max), (1, 4, 9)))
+
+
+class SwizzleTest(unittest.TestCase):
+	def test_vector(self):
+		v = V(1, 2, 3)
+		self.assertEqual(v.y, 2)
+		self.assertEqual((v.o, v.n), (1, 0))
+		self.assertIsInstance(v.zyx, V)
+		self.assertEqual(tuple(v.zyx), (3, 2, 1))
+		self.assertEqual(tuple(v.xyzo), (1, 2, 3, 1))
+		self.assertEqual(tuple(V(1, 2).xyno), (1, 2, 0, 1))
+		with self.assertRaises(IndexError):
+			V(1, 2).xyz
+		with self.assertRaises(AttributeError):
+			v.nothing
+
+	def test_matrix(self):
+		m = M([1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16])
+		self.assertEqual(m.a12, 2)
+		self.assertEqual(m.a4_1, 13)
+		self.assertEqual(tuple(m.col4), (4, 8, 12, 16))
+		self.assertEqual(tuple(m.row2), (5, 6, 7, 8))
+		self.assertEqual(m.a11_a22.tolist(), [[1, 2], [5, 6]])
+		self.assertEqual(tuple(m.a11a22a33), (1, 6, 11))
+		self.assertEqual(tuple(m.y), (5, 6, 7, 8))
+		with self.assertRaises(AttributeError):
+			m.nothing
+
+
+class ConstructionTest(unittest.TestCase):
+	def test_vector(self):
+		a = numpy.array([1, 2, 3])
+		v = V(a)
+		self.assertEqual(v.dtype, float)
+		a[0] = 5
+		self.assertEqual(tuple(v), (1, 2, 3))
+		self.assertEqual(tuple(V(1, 2.5)), (1, 2.5))
+		self.assertEqual(tuple(V(x for x in range(3))), (0, 1, 2))
+		self.assertTrue(V(sympy.Symbol("a"), 1).isSymbolic)
+
+	def test_matrix(self):
+		A = numpy.identity(4)
+		m = M(A)
+		A[0, 0] = 5
+		self.assertEqual(m.dtype, float)
+		self.assertEqual(m.tolist(), numpy.identity(4).tolist())
+		self.assertEqual(M().tolist(), numpy.identity(4).tolist())
+		self.assertTrue(M([sympy.Symbol("a"), 0], [0, 1]).isSymbolic)
+		with self.assertRaises(ValueError):
+			M([1, 2], [3])
+
+
+class SymbolicTest(unittest.TestCase):
+	def test_numeric(self):
+		self.assertFalse(isSymbolic(1.5))
+		self.assertFalse(isSymbolic(numpy.float64(1)))
+		self.assertFalse(V(1, 2).isSymbolic)
+		self.assertFalse(M.Translation((1, 2, 3)).isSymbolic)
+		self.assertAlmostEqual(sin(30), 0.5)
+		self.assertAlmostEqual(cos(numpy.float64(60)), 0.5)
+		self.assertEqual(type(asin(0.5)), float)
+
+	def test_symbolic(self):
+		a = sympy.Symbol("a")
+		self.assertTrue(isSymbolic(a))
+		self.assertTrue((V(1, 2) * a).isSymbolic)
+		self.assertEqual(sin(a), sympy.sin(a * sympy.pi / 180))
+		self.assertEqual(cosSin(a)[0], sympy.cos(a * sympy.pi / 180))
+		with self.assertRaises(NotImplementedError):
+			M.Translation((a, 0, 0)).inverse
+
+	def test_pi(self):
+		self.assertEqual(2 * pi, 2 * sympy.pi)
+		self.assertEqual(sympy.cos(pi), -1)
+		self.assertTrue(isSymbolic(pi))
+		self.assertTrue(V(pi, 0).isSymbolic)
+		self.assertEqual(float(pi), pi_float)
+
+	def test_lazyImport(self):
+		# sympy is only imported once a symbolic value is used
+		script = "\n".join([
+		  "import __main__, sys",
+		  "__main__.__file__ = 'model.py'",
+		  "from haksolid2.math import *",
+		  "M.RotationZ(30).inverse, cosSin(45), V(1, 2).isSymbolic, pi_float",
+		  "assert 'sympy' not in sys.modules",
+		  "assert isSymbolic(sympy.Symbol('a'))",
+		])
+		subprocess.run([sys.executable, "-c", script],
+		               cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+		               check=True)
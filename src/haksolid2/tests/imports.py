@@ -0,0 +1,33 @@
+import unittest
+import subprocess
+import sys
+import os
+
+srcDirectory = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def runScript(*lines):
+	script = "\n".join(("import __main__, sys", "__main__.__file__ = 'model.py'") +
+	                   lines)
+	subprocess.run([sys.executable, "-c", script], cwd=srcDirectory, check=True)
+
+
+class ImportTest(unittest.TestCase):
+	def test_lazySubpackages(self):
+		# heavy and optional dependencies stay unloaded until they are used
+		runScript(
+		  "import haksolid2",
+		  "for name in ('haksolid2.openscad', 'haksolid2.paradigms', 'haksolid2.exporters', 'sympy', 'slvs', 'http.server', 'jsonschema', 'pyinotify'):",
+		  "	assert name not in sys.modules, name",
+		  "assert haksolid2.openscad.OpenSCADBuild",
+		  "assert haksolid2.paradigms.lasercut.LasercutLayer",
+		  "assert 'haksolid2.paradigms.netfold' not in sys.modules",
+		)
+
+	def test_starImport(self):
+		runScript(
+		  "from haksolid2.paradigms import *",
+		  "from haksolid2.exporters import *",
+		  "assert netfold.triad and Cura and KiCAD",
+		  "assert 'slvs' not in sys.modules",
+		)
@@ -0,0 +1,201 @@
+import unittest
+import subprocess
+import tempfile
+import shutil
+import sys
+import os
+import textwrap
+
+srcDirectory = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# a model of two modules: lib registers an entity itself, main registers one
+# using lib and imports other
+Sources = {
+  "lib.py":
+  """
+  from haksolid2 import processing, primitives
+  VERSION = 1
+
+  def shape():
+  	primitives.cuboid(VERSION)
+
+  @processing.part.module(process=processing.ProcessBase())
+  def libPart():
+  	shape()
+  """,
+  "other.py":
+  """
+  VERSION = 1
+  """,
+  "main.py":
+  """
+  import sys
+  sys.dont_write_bytecode = True
+  from haksolid2 import processing
+  from haksolid2.processing import reload
+  import lib, other
+
+  @processing.part.module(process=processing.ProcessBase())
+  def mainPart():
+  	lib.shape()
+
+  def modify(fn, text):
+  	with open(fn, "w") as f:
+  		f.write(text)
+  	return os.path.realpath(fn)
+
+  if not reload.Reloading:
+  	import os
+  	ents = processing.entities.getEntities()
+  	assert ents["libPart"].module == "lib"
+  	assert ents["mainPart"].module == "__main__"
+
+  	fn = modify("other.py", "VERSION = 2\\n")
+  	lib_before = sys.modules["lib"]
+  	assert reload.reloadModules({fn}) == {"other", "__main__"}
+  	assert sys.modules["other"].VERSION == 2
+  	assert sys.modules["lib"].VERSION == 1
+  	assert processing.entities.getEntities()["libPart"] is ents["libPart"]
+  	assert processing.entities.getEntities()["mainPart"] is not ents["mainPart"]
+
+  	fn = modify("lib.py", open("lib.py").read().replace("VERSION = 1", "VERSION = 3"))
+  	assert reload.reloadModules({fn}) == {"lib", "__main__"}
+  	assert sys.modules["lib"].VERSION == 3
+  	ents = processing.entities.getEntities()
+  	assert set(ents) == {"libPart", "mainPart"}
+  	assert ents["libPart"].module == "lib"
+
+  	assert reload.reloadModules({processing.__file__}) is None
+  """,
+}
+
+
+# parts depending on different modules and an imported file, built with
+# dependency tracking
+DependencySources = {
+  "lib.py":
+  """
+  from haksolid2 import primitives
+
+  def shape():
+  	~primitives.cuboid(1)
+
+  def unused():
+  	pass
+  """,
+  "helper.py":
+  """
+  from haksolid2 import primitives
+
+  def mesh():
+  	~primitives.geometryImport("mesh.stl")
+  """,
+  "main.py":
+  """
+  import sys, os
+  sys.dont_write_bytecode = True
+  from haksolid2 import processing
+  from haksolid2.processing import dependencies
+  import lib, helper
+
+  @processing.part.module(process=processing.ProcessBase())
+  def shapePart():
+  	lib.shape()
+
+  @processing.part.module(process=processing.ProcessBase())
+  def meshPart():
+  	helper.mesh()
+
+  @processing.part.module(process=processing.ProcessBase())
+  def plainPart():
+  	pass
+
+  dependencies.TrackDependencies = True
+  ents = processing.entities.getEntities()
+  for ent in ents.values():
+  	ent.node
+  ents["shapePart"].namedCopy("shapePart-preset").node
+
+  lib_fn, helper_fn, mesh_fn, main_fn = (os.path.realpath(fn) for fn in
+    ("lib.py", "helper.py", "mesh.stl", "main.py"))
+  shape = dependencies.getDependencies("shapePart")
+  assert shape.sources == {lib_fn, main_fn}
+  assert ("lib", "shape") in shape.functions
+  assert ("lib", "unused") not in shape.functions
+  assert shape.imports == set()
+  assert dependencies.getDependencies("shapePart-preset") is None
+  mesh = dependencies.getDependencies("meshPart")
+  assert mesh.sources == {helper_fn, main_fn}
+  assert mesh.imports == {mesh_fn}
+  assert dependencies.trackedFiles() == {mesh_fn}
+
+  affected = dependencies.affectedEntities
+  assert affected(ents, {lib_fn}) == {"shapePart"}
+  assert affected(ents, {mesh_fn}) == {"meshPart"}
+  assert affected(ents, {main_fn}) == set(ents)
+  ents["newPart"] = processing.EntityRecord(processing.part, lambda: None,
+    "newPart", None, processing.ProcessBase())
+  ents["newPart"].module = "lib"
+  assert affected(ents, {lib_fn}, {"lib"}) == {"shapePart", "newPart"}
+  """,
+}
+
+
+# a part reading a module-level value of an imported module, which is rebuilt
+# when the value changes even though none of its functions is in that module
+ModuleValueSources = {
+  "other.py":
+  """
+  VERSION = 1
+  """,
+  "main.py":
+  """
+  import sys, os
+  sys.dont_write_bytecode = True
+  from haksolid2 import processing, primitives
+  from haksolid2.processing import dependencies, reload
+  import other
+
+  @processing.part.module(process=processing.ProcessBase())
+  def versionPart():
+  	~primitives.cuboid(other.VERSION)
+
+  if not reload.Reloading:
+  	dependencies.TrackDependencies = True
+  	processing.entities.getEntities()["versionPart"].node
+
+  	fn = os.path.realpath("other.py")
+  	with open(fn, "w") as f:
+  		f.write("VERSION = 2\\n")
+  	affected = reload.reloadModules({fn})
+  	assert affected == {"other", "__main__"}
+  	ents = processing.entities.getEntities()
+  	assert dependencies.affectedEntities(ents, {fn}, affected) == {"versionPart"}
+  """,
+}
+
+
+def runProject(sources):
+	"""Runs main.py of a model project written to a temporary directory"""
+	fn = tempfile.mkdtemp()
+	try:
+		for fb, source in sources.items():
+			with open(os.path.join(fn, fb), "w") as f:
+				f.write(textwrap.dedent(source))
+		env = dict(os.environ)
+		env["PYTHONPATH"] = os.pathsep.join(
+		  [srcDirectory, fn] + env.get("PYTHONPATH", "").split(os.pathsep))
+		subprocess.run([sys.executable, "main.py"], cwd=fn, env=env, check=True)
+	finally:
+		shutil.rmtree(fn)
+
+
+class ReloadTest(unittest.TestCase):
+	def test_reloadModules(self):
+		runProject(Sources)
+
+	def test_dependencies(self):
+		runProject(DependencySources)
+
+	def test_moduleValue(self):
+		runProject(ModuleValueSources)
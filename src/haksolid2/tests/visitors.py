@@ -44,3 +44,44 @@ class VisitorTest(unittest.TestCase):
 				if (abs(T - T1) <= 1e-2).all():
 					found += 1
 			self.assertEqual(found, 1)
+
+	def test_transformStack(self):
+		stack = usability.TransformStack(capacity=2)
+		self.assertEqual(len(stack), 1)
+		self.assertTrue((stack[-1] == M()).all())
+
+		T = M.Translation((1, 2, 3))
+		stack.append(T)
+		stack.append(T @ T)
+		stack.append(M.Translation((sympy.Symbol("a"), 0, 0)))
+		self.assertEqual(len(stack), 4)
+		self.assertTrue(stack[-1].isSymbolic)
+		self.assertEqual(stack.pop().a14, sympy.Symbol("a"))
+		self.assertTrue((stack[-1] == T @ T).all())
+		stack.pop()
+		self.assertTrue((stack[-1] == T).all())
+		self.assertEqual(len(list(stack)), 2)
+
+	def test_transformVisitor(self):
+		class LeafVisitor(usability.TransformVisitor):
+			def __init__(s):
+				usability.TransformVisitor.__init__(s)
+				s.leaves = dict()
+
+			def __call__(s, node):
+				usability.TransformVisitor.__call__(s, node)
+				if isinstance(node, TestNode):
+					s.leaves[node.v] = M(s.absTransform)
+
+		root = transform.translate(1)
+		a = transform.translate(0, 2)
+		root * a * transform.translate(0, 0, 3) * TestNode("ab")
+		a * TestNode("a")
+		root * transform.translate(0, 0, 3) * transform.untransform() * TestNode(
+		  "none")
+
+		v = LeafVisitor()
+		root.visitDescendants(v)
+		self.assertTrue((v.leaves["ab"] == M.Translation((1, 2, 3))).all())
+		self.assertTrue((v.leaves["a"] == M.Translation((1, 2, 0))).all())
+		self.assertTrue((v.leaves["none"] == M()).all())
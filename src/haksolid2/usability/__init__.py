@@ -1,7 +1,7 @@
 from .attributePatterns import AttributePattern, BoxAnchorPattern, CylinderAnchorPattern
 from .conditionalNodes import OptionalConditionalNode
 from .flexibleArguments import getFlexibleExtent3, getFlexibleAxis3, getFlexibleExtent2, getFlexibleRadiusOrNone, getFlexibleRadius, getFlexibleDualRadius, getFlexibleMatrix
-from .visitors import PrintVisitor, TransformVisitor, AllAbsTransformsVisitor
+from .visitors import PrintVisitor, TransformStack, TransformVisitor, AllAbsTransformsVisitor
 from .operatorAdapters import OperationsAdapter
-from .shorthands import fn_main
+from .shorthands import fn_main, mainFile
 from .partgroup import partgroup, subpart, subassembly
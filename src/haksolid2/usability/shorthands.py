@@ -1,6 +1,16 @@
 import os
+import sys
 import pathlib
 
-import __main__
 
-fn_main = pathlib.Path(os.path.dirname(os.path.realpath(__main__.__file__)))
+def mainFile():
+	"""Returns the path of the main script. Build workers spawned by climain -j
+	import it as __mp_main__, while their __main__ is multiprocessing's."""
+	for name in ("__main__", "__mp_main__"):
+		fn = getattr(sys.modules.get(name), "__file__", None)
+		if fn is not None:
+			return os.path.realpath(fn)
+	return None
+
+
+fn_main = pathlib.Path(os.path.dirname(mainFile() or os.path.join(os.getcwd(), "")))
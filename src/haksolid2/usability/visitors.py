@@ -19,21 +19,90 @@ class PrintVisitor(dag.DAGVisitor):
 		s.depth -= 1
 
 
+def _product(A, B, out):
+	"""Computes A @ B into out without allocating, unless one of the operands is
+	symbolic"""
+	if A.dtype == object or B.dtype == object:
+		return A @ B
+	numpy.matmul(A, B, out=out)
+	return out
+
+
+class TransformStack:
+	"""Stack of 4x4 transforms backed by a preallocated (depth,4,4) float array,
+	supporting the list operations append, pop, len and indexing. Pushing copies
+	the matrix into the array and entries are returned as views, so neither
+	allocates in the numeric case. Views are only valid until their slot is
+	overwritten, keep copies (M(...)) of entries that outlive the stack
+	operations. Symbolic matrices are kept aside as objects."""
+	def __init__(s, capacity=16):
+		s._size = 0
+		s._data = numpy.empty((0, 4, 4))
+		s._views = list()
+		s._symbolic = list()
+		s._reserve(capacity)
+		s.append(M())
+
+	def _reserve(s, capacity):
+		if capacity <= len(s._data): return
+		data = numpy.empty((capacity, 4, 4))
+		data[:s._size] = s._data[:s._size]
+		s._data = data
+		s._views = [data[i].view(M) for i in range(capacity)]
+		s._symbolic += [None] * (capacity - len(s._symbolic))
+
+	def __len__(s):
+		return s._size
+
+	def __getitem__(s, i):
+		if i < 0: i += s._size
+		if not 0 <= i < s._size:
+			raise IndexError("transform stack index out of range")
+		if s._symbolic[i] is not None:
+			return s._symbolic[i]
+		return s._views[i]
+
+	def __iter__(s):
+		for i in range(s._size):
+			yield s[i]
+
+	def append(s, T):
+		if s._size >= len(s._data):
+			s._reserve(2 * len(s._data))
+		if T.dtype == object:
+			s._symbolic[s._size] = T
+		else:
+			s._symbolic[s._size] = None
+			s._data[s._size] = T
+		s._size += 1
+
+	def pop(s):
+		if s._size < 1:
+			raise IndexError("pop from empty transform stack")
+		res = s[-1]
+		s._size -= 1
+		return res
+
+
 class TransformVisitor(dag.DAGVisitor):
+	"""Tracks the absolute transform of each visited node. absTransform may be a
+	view into a buffer reused for the next node, copy it to keep it."""
 	def __init__(s):
 		dag.DAGVisitor.__init__(s)
-		s.transformStack = list()
-		s.transformStack.append(M())
-		s.absTransform = M()
+		s.transformStack = TransformStack()
+		s._absBuffer = M()
+		s.absTransform = s._absBuffer
 
 	def __call__(s, node):
 		if isinstance(node, transform.AffineTransform):
-			s.absTransform = s.transformStack[-1] @ node.matrix
+			s.absTransform = _product(s.transformStack[-1], node.matrix,
+			                          s._absBuffer)
 		elif isinstance(node, transform.untransform):
-			s.absTransform = M()
+			s._absBuffer[...] = numpy.identity(4)
+			s.absTransform = s._absBuffer
 
 	def descent(s):
-		s.transformStack.append(M(s.absTransform))
+		s.transformStack.append(s.absTransform)
 
 	def ascend(s):
 		s.transformStack.pop()
@@ -43,9 +112,9 @@ class TransformVisitor(dag.DAGVisitor):
 class AllAbsTransformsVisitor(dag.DAGVisitor):
 	def __init__(s):
 		s.absTransforms = list()
-		s.transformStack = list()
-		s.transformStack.append(M())
-		s.absTransform = M()
+		s.transformStack = TransformStack()
+		s._absBuffer = M()
+		s.absTransform = s._absBuffer
 		s.isRoot = False
 		s.currentNode = None
 
@@ -53,20 +122,21 @@ class AllAbsTransformsVisitor(dag.DAGVisitor):
 		s.isRoot = False
 		s.currentNode = node
 		if isinstance(node, transform.AffineTransform):
-			s.absTransform = node.matrix @ s.transformStack[-1]
+			s.absTransform = _product(node.matrix, s.transformStack[-1],
+			                          s._absBuffer)
 		elif isinstance(node, transform.untransform):
-			s.absTransforms.append(s.absTransform)
+			s.absTransforms.append(M(s.absTransform))
 			return False
 		elif isinstance(node, dag.DAGVirtualRoot):
 			return False
 			
 	def descent(s):
-		s.transformStack.append(M(s.absTransform))
+		s.transformStack.append(s.absTransform)
 		s.isRoot = not isinstance(s.currentNode, dag.DAGVirtualRoot)
 
 	def ascend(s):
 		if s.isRoot:
-			s.absTransforms.append(s.absTransform)
+			s.absTransforms.append(M(s.absTransform))
 		s.transformStack.pop()
 		s.absTransform = s.transformStack[-1]
 		s.isRoot = False
\ No newline at end of file